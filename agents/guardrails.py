@@ -1,119 +1,165 @@
-from typing import Dict, Any, List
-from langchain_core.messages import BaseMessage, AIMessage
+from typing import Dict, Any, List, NamedTuple, Optional
+from langchain_core.messages import BaseMessage
 import re
 
+
+class ValidationResult(NamedTuple):
+    """Resultado de validação de entrada (mais leve que um dict por chamada)"""
+    valid: bool
+    message: str
+    sanitized_input: Optional[str]
+
+
+class AppropriatenessResult(NamedTuple):
+    """Resultado da checagem de conteúdo apropriado"""
+    appropriate: bool
+    reason: str
+
+
+class OutputValidationResult(NamedTuple):
+    """Resultado de validação de saída"""
+    valid: bool
+    processed_response: str
+
+
+class ConversationLengthResult(NamedTuple):
+    """Resultado da checagem de tamanho da conversa"""
+    should_summarize: bool
+    message_count: int
+    warning: Optional[str]
+
+# Padrões de injection fundidos em uma única alternation compilada no import:
+# a engine em C faz uma só passada pela string em vez de três buscas separadas
+_INJECTION_RE = re.compile(
+    r"(?is)javascript:|<script[^>]*>.*?</script>|on\w+\s*="
+)
+
+# Opcional: Hyperscan (DFA, tempo linear garantido) para o scan de injection.
+# Elimina risco de backtracking catastrófico em entradas de até 10 KB
+# controladas pelo usuário. Se a lib não estiver instalada, usa o regex acima.
+try:
+    import hyperscan as _hs
+
+    _INJECTION_DB = _hs.Database()
+    _INJECTION_DB.compile(
+        expressions=[
+            rb"javascript:",
+            rb"<script[^>]*>.*?</script>",
+            rb"on\w+\s*=",
+        ],
+        flags=[_hs.HS_FLAG_CASELESS | _hs.HS_FLAG_DOTALL] * 3,
+    )
+except ImportError:
+    _INJECTION_DB = None
+
+
+# Lista básica de palavras/padrões inapropriados
+# Em produção, use uma lista mais completa ou serviço de moderação
+_INAPPROPRIATE_WORDS = (
+    # Adicione padrões conforme necessário
+)
+
+# Alternation única com IGNORECASE: dispensa o `.lower()` (que copia a string
+# inteira) e faz uma só passada em vez de N buscas com `in`
+_INAPPROPRIATE_RE = (
+    re.compile("|".join(map(re.escape, _INAPPROPRIATE_WORDS)), re.IGNORECASE)
+    if _INAPPROPRIATE_WORDS else None
+)
+
+
+def _contains_injection(text: str) -> bool:
+    """Verifica padrões de injection usando Hyperscan quando disponível"""
+    if _INJECTION_DB is not None:
+        matched = []
+        _INJECTION_DB.scan(
+            text.encode("utf-8", errors="replace"),
+            match_event_handler=lambda *args: matched.append(True),
+        )
+        return bool(matched)
+    return _INJECTION_RE.search(text) is not None
+
 class InputGuardrails:
     """Guardrails para validação de entrada do usuário"""
     
     @staticmethod
-    def validate_input(user_input: str) -> Dict[str, Any]:
+    def validate_input(user_input: str) -> ValidationResult:
         """
         Valida e sanitiza a entrada do usuário
-        
+
         Returns:
-            dict com 'valid', 'message', 'sanitized_input'
+            ValidationResult com 'valid', 'message', 'sanitized_input'
         """
         # Verifica se entrada está vazia
-        if not user_input or not user_input.strip():
-            return {
-                "valid": False,
-                "message": "Por favor, digite uma mensagem válida.",
-                "sanitized_input": None
-            }
-        
-        # Limita tamanho da entrada
+        if not user_input:
+            return ValidationResult(False, "Por favor, digite uma mensagem válida.", None)
+
+        # Limita tamanho da entrada — checagem O(1) na string bruta, antes
+        # do strip() (que copiaria até 10 KB só para depois rejeitar).
+        # Também limita o custo do scan de injection em entradas patológicas.
         max_length = 10000
         if len(user_input) > max_length:
-            return {
-                "valid": False,
-                "message": f"Mensagem muito longa. Máximo permitido: {max_length} caracteres.",
-                "sanitized_input": None
-            }
-        
-        # Remove caracteres de controle perigosos
+            return ValidationResult(
+                False,
+                f"Mensagem muito longa. Máximo permitido: {max_length} caracteres.",
+                None
+            )
+
+        # Remove caracteres de controle perigosos (uma única cópia strip)
         sanitized = user_input.strip()
-        
-        # Detecta possíveis tentativas de injection
-        injection_patterns = [
-            r"<script[^>]*>.*?</script>",
-            r"javascript:",
-            r"on\w+\s*=",
-        ]
-        
-        for pattern in injection_patterns:
-            if re.search(pattern, sanitized, re.IGNORECASE):
-                return {
-                    "valid": False,
-                    "message": "Entrada contém conteúdo potencialmente perigoso.",
-                    "sanitized_input": None
-                }
-        
-        return {
-            "valid": True,
-            "message": "Entrada válida",
-            "sanitized_input": sanitized
-        }
+
+        if not sanitized:
+            return ValidationResult(False, "Por favor, digite uma mensagem válida.", None)
+
+        # Detecta possíveis tentativas de injection (uma única passada)
+        if _contains_injection(sanitized):
+            return ValidationResult(
+                False, "Entrada contém conteúdo potencialmente perigoso.", None
+            )
+
+        return ValidationResult(True, "Entrada válida", sanitized)
     
     @staticmethod
-    def check_message_appropriateness(user_input: str) -> Dict[str, Any]:
+    def check_message_appropriateness(user_input: str) -> AppropriatenessResult:
         """
         Verifica se a mensagem é apropriada (básico)
-        
+
         Returns:
-            dict com 'appropriate' e 'reason'
+            AppropriatenessResult com 'appropriate' e 'reason'
         """
-        # Lista básica de palavras/padrões inapropriados
-        # Em produção, use uma lista mais completa ou serviço de moderação
-        inappropriate_patterns = [
-            # Adicione padrões conforme necessário
-        ]
-        
-        lower_input = user_input.lower()
-        
-        for pattern in inappropriate_patterns:
-            if pattern in lower_input:
-                return {
-                    "appropriate": False,
-                    "reason": "Conteúdo inapropriado detectado"
-                }
-        
-        return {
-            "appropriate": True,
-            "reason": "Conteúdo apropriado"
-        }
+        if _INAPPROPRIATE_RE is not None and _INAPPROPRIATE_RE.search(user_input):
+            return AppropriatenessResult(False, "Conteúdo inapropriado detectado")
+
+        return AppropriatenessResult(True, "Conteúdo apropriado")
+
+
+# Caracteres que indicam resposta concluída (frozenset: lookup O(1))
+_TERMINATORS = frozenset((".", "!", "?", "”", "»"))
+
+# Mapeamento de erros conhecidos (módulo: construído uma vez, não por chamada)
+_FRIENDLY_MESSAGES = {
+    "RateLimitError": "Desculpe, estou recebendo muitas requisições no momento. Por favor, aguarde alguns segundos e tente novamente.",
+    "TimeoutError": "A requisição demorou muito para ser processada. Por favor, tente uma pergunta mais simples ou tente novamente.",
+    "AuthenticationError": "Erro de autenticação com o serviço de IA. Por favor, verifique as configurações.",
+    "InvalidRequestError": "Sua requisição não pôde ser processada. Por favor, reformule sua pergunta.",
+    "APIError": "Erro temporário ao comunicar com o serviço de IA. Por favor, tente novamente em alguns instantes.",
+}
+
+_DEFAULT_ERROR_MESSAGE = "Desculpe, ocorreu um erro ao processar sua solicitação."
 
 
 class OutputGuardrails:
     """Guardrails para validação e processamento de saída"""
     
     @staticmethod
-    def validate_output(response: str) -> Dict[str, Any]:
+    def validate_output(response: str) -> OutputValidationResult:
         if not response or len(response.strip()) < 5:
-            return {
-                "valid": False,
-                "processed_response": "Não foi possível consolidar os dados. Tente perguntar sobre 'Projetos do Nycolas'."
-            }
-        
+            return OutputValidationResult(
+                False,
+                "Não foi possível consolidar os dados. Tente perguntar sobre 'Projetos do Nycolas'."
+            )
+
         # Remove espaços extras e garante que a resposta termine bem
-        clean_response = response.strip()
-        return {
-            "valid": True,
-            "processed_response": clean_response
-        }
-        
-        # Verifica truncamento
-        if len(response) < 10:
-            return {
-                "valid": False,
-                "message": "Resposta muito curta (possível truncamento)",
-                "processed_response": f"{response}\n\n[Nota: A resposta pode ter sido truncada. Tente fazer uma pergunta mais específica.]"
-            }
-        
-        return {
-            "valid": True,
-            "message": "Resposta válida",
-            "processed_response": response.strip()
-        }
+        return OutputValidationResult(True, response.strip())
     
     @staticmethod
     def handle_error_gracefully(error: Exception, context: str = "") -> str:
@@ -128,44 +174,35 @@ class OutputGuardrails:
             Mensagem amigável para o usuário
         """
         error_type = type(error).__name__
-        error_msg = str(error)
-        
-        # Mapeamento de erros conhecidos
-        friendly_messages = {
-            "RateLimitError": "Desculpe, estou recebendo muitas requisições no momento. Por favor, aguarde alguns segundos e tente novamente.",
-            "TimeoutError": "A requisição demorou muito para ser processada. Por favor, tente uma pergunta mais simples ou tente novamente.",
-            "AuthenticationError": "Erro de autenticação com o serviço de IA. Por favor, verifique as configurações.",
-            "InvalidRequestError": "Sua requisição não pôde ser processada. Por favor, reformule sua pergunta.",
-            "APIError": "Erro temporário ao comunicar com o serviço de IA. Por favor, tente novamente em alguns instantes.",
-        }
-        
-        if error_type in friendly_messages:
-            base_message = friendly_messages[error_type]
-        else:
-            base_message = "Desculpe, ocorreu um erro ao processar sua solicitação."
-        
-        # Adiciona contexto técnico se disponível
-        technical_info = f"\n\n[Detalhes técnicos: {error_type}"
-        if context:
-            technical_info += f" em {context}"
-        technical_info += "]"
-        
-        return base_message + technical_info
+
+        # Um único .get() (hasheia a chave uma vez) e uma única alocação
+        # de f-string para a mensagem final
+        base_message = _FRIENDLY_MESSAGES.get(error_type, _DEFAULT_ERROR_MESSAGE)
+        ctx = f" em {context}" if context else ""
+
+        return f"{base_message}\n\n[Detalhes técnicos: {error_type}{ctx}]"
     
     @staticmethod
     def ensure_complete_response(messages: List[BaseMessage]) -> str:
         if not messages: return ""
-        
+
         last_message = messages[-1]
-        if isinstance(last_message, AIMessage):
-            content = last_message.content
-            
+        # Duck typing: só precisamos de .content — evita o isinstance
+        # (caminhada na MRO) a cada turno
+        content = getattr(last_message, "content", None)
+        if content is not None:
             # Só adicionamos o aviso se realmente houver evidência de corte
-            # (ex: frase terminando no meio de uma palavra)
-            if content and not content.rstrip()[-1] in (".", "!", "?", "”", "»"):
+            # (ex: frase terminando no meio de uma palavra).
+            # Anda de trás para frente pulando whitespace em vez de rstrip(),
+            # que copiaria a resposta inteira só para olhar o último caractere
+            i = len(content) - 1
+            while i >= 0 and content[i].isspace():
+                i -= 1
+
+            if i >= 0 and content[i] not in _TERMINATORS:
                 # Em vez de apenas o aviso, poderíamos sugerir "Continue"
-                return content + "..." 
-            
+                return content + "..."
+
             return content
         return str(last_message)
 
@@ -174,20 +211,20 @@ class ConversationGuardrails:
     """Guardrails para gerenciar a conversa como um todo"""
     
     @staticmethod
-    def check_conversation_length(messages: List[BaseMessage], max_turns: int = 50) -> Dict[str, Any]:
+    def check_conversation_length(messages: List[BaseMessage], max_turns: int = 50) -> ConversationLengthResult:
         """
         Verifica se a conversa está muito longa
-        
+
         Returns:
-            dict com 'should_summarize', 'message_count'
+            ConversationLengthResult com 'should_summarize', 'message_count', 'warning'
         """
         message_count = len(messages)
-        
-        return {
-            "should_summarize": message_count > max_turns,
-            "message_count": message_count,
-            "warning": f"Conversa com {message_count} mensagens. Considere iniciar uma nova conversa para melhor performance." if message_count > max_turns else None
-        }
+
+        return ConversationLengthResult(
+            should_summarize=message_count > max_turns,
+            message_count=message_count,
+            warning=f"Conversa com {message_count} mensagens. Considere iniciar uma nova conversa para melhor performance." if message_count > max_turns else None
+        )
     
     @staticmethod
     def detect_loops(messages: List[BaseMessage], window: int = 6) -> bool:
@@ -203,13 +240,10 @@ class ConversationGuardrails:
         """
         if len(messages) < window:
             return False
-        
-        recent_messages = [m.content for m in messages[-window:]]
-        
-        # Verifica repetições exatas
-        unique_messages = set(recent_messages)
-        
-        if len(unique_messages) <= 2:  # Muito pouca variação
-            return True
-        
-        return False
\ No newline at end of file
+
+        # Fingerprint barato (prefixo de 256 chars) em vez de hashear o
+        # conteúdo inteiro — respostas da IA podem ter vários KB
+        fingerprints = {hash(m.content[:256]) for m in messages[-window:]}
+
+        # Muito pouca variação indica repetição
+        return len(fingerprints) <= 2
\ No newline at end of file
@@ -1,11 +1,43 @@
-from typing import Literal
+import asyncio
+from typing import List, Literal
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from config.llm_factory import llm_factory
 from prompts.system_prompts import get_router_prompt
 from utils.toon_converter import TOONConverter, TOONPromptBuilder
+import functools
 import json
+import logging
+import re
+import weakref
+
+# Logger lazy: com nível acima de DEBUG, a formatação (%s) nem é executada —
+# sem f-strings nem writes síncronos em stdout no caminho quente
+_log = logging.getLogger(__name__)
+
+# orjson (Rust) parseia JSON 2-5x mais rápido que a stdlib; opcional, com
+# fallback transparente (orjson.JSONDecodeError herda de json.JSONDecodeError)
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Remove cercas de markdown (```json ... ```) da resposta do LLM em uma única
+# passada C-level, em vez de vários startswith/split por chamada.
+# A cerca de fechamento é opcional (respostas truncadas ainda são aceitas).
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*(?:```\s*)?$", re.DOTALL)
+
+
+def _strip_markdown_fence(text: str) -> str:
+    """Remove cercas de markdown da resposta, sem alocações no caso comum"""
+    # Fast-path: a maioria das respostas não vem cercada — um startswith
+    # O(3) evita acionar a engine de regex (e qualquer alocação) à toa
+    if "```" not in text[:16]:
+        return text.strip()
+
+    match = _FENCE_RE.match(text)
+    return match.group(1) if match else text.strip()
 
 class RouterOutput(BaseModel):
     """Schema para saída estruturada do Router"""
@@ -21,6 +53,89 @@ class RouterOutput(BaseModel):
         description="Breve explicação da decisão"
     )
 
+# Schema e exemplos do prompt TOON são constantes — definidos uma vez no
+# import em vez de realocados a cada chamada de route()
+_TOON_OUTPUT_SCHEMA = {
+    "category": "string (CALCULATOR|RAG|WEB_SEARCH|DATETIME|DIRECT)",
+    "confidence": "float (0.0-1.0)",
+    "reasoning": "string (brief explanation)"
+}
+
+_TOON_EXAMPLES = [
+    {
+        "input": {"query": "Calculate 128 * 46"},
+        "output": {
+            "category": "CALCULATOR",
+            "confidence": 0.98,
+            "reasoning": "Mathematical operation detected"
+        }
+    },
+    {
+        "input": {"query": "Tell me about LLMs in your knowledge base"},
+        "output": {
+            "category": "RAG",
+            "confidence": 0.95,
+            "reasoning": "Technical topic in internal knowledge base"
+        }
+    },
+    {
+        "input": {"query": "Who is the president of Brazil in 2025?"},
+        "output": {
+            "category": "WEB_SEARCH",
+            "confidence": 0.99,
+            "reasoning": "Current political information requiring web search"
+        }
+    },
+    {
+        "input": {"query": "What time is it?"},
+        "output": {
+            "category": "DATETIME",
+            "confidence": 0.99,
+            "reasoning": "Temporal information request"
+        }
+    },
+    {
+        "input": {"query": "Who was Einstein?"},
+        "output": {
+            "category": "DIRECT",
+            "confidence": 0.90,
+            "reasoning": "Historical general knowledge question"
+        }
+    },
+    {
+        "input": {"query": "Latest AI news"},
+        "output": {
+            "category": "WEB_SEARCH",
+            "confidence": 0.97,
+            "reasoning": "Current news requiring web search"
+        }
+    }
+]
+
+# Placeholder usado para fatiar o prompt pré-construído em prefixo/sufixo
+_QUERY_PLACEHOLDER = "__QUERY__"
+
+# Fast-path: classificadores regex para casos inequívocos, evitando a
+# chamada ao LLM (centenas de ms) quando a query é claramente matemática
+# ou temporal. Casos ambíguos caem no fluxo normal via LLM. A alternativa
+# numérica é ancorada na entrada inteira: "2 + 2?" é aritmética, mas um
+# intervalo no meio de uma frase ("projetos de 2019 - 2022") não é.
+_CALC_FAST_RE = re.compile(
+    r"(?i)\b(calcul\w*|quanto é|raiz quadrada|soma de|vezes|elevado a)\b"
+    r"|^\s*\d+(?:[.,]\d+)?(?:\s*[-+*/^]\s*\d+(?:[.,]\d+)?)+[\s?.!]*$"
+)
+_TIME_FAST_RE = re.compile(
+    r"(?i)\b(que horas|hora atual|data de hoje|data atual|dias entre|que dia é)\b"
+)
+
+# Extração de categoria no fallback: uma passada C-level com IGNORECASE,
+# sem alocar a cópia .upper() da resposta inteira do LLM
+_CATEGORY_RE = re.compile(r"WEB_SEARCH|CALCULATOR|DATETIME|RAG|DIRECT", re.IGNORECASE)
+
+# Categorias válidas (frozenset no módulo: sem realocação do set por chamada)
+_VALID_CATEGORIES = frozenset({"CALCULATOR", "RAG", "WEB_SEARCH", "DATETIME", "DIRECT"})
+
+
 class RouterAgent:
     """
     Router Agent que classifica a pergunta do usuário usando JSON→TOON→JSON
@@ -40,9 +155,26 @@ class RouterAgent:
         self.prompt = get_router_prompt()
         self.use_toon = use_toon
         self.parser = JsonOutputParser(pydantic_object=RouterOutput)
-        
-        print(f"[ROUTER] ✓ Router Agent inicializado (TOON: {use_toon})")
-        print(f"[ROUTER] Categorias: CALCULATOR, RAG, WEB_SEARCH, DATETIME, DIRECT")
+
+        # Pré-constrói o prompt TOON uma única vez: em cada route() só a
+        # query do usuário é interpolada entre prefixo e sufixo
+        skeleton = TOONPromptBuilder.build_structured_prompt(
+            task=self.prompt,
+            input_data={
+                "query": _QUERY_PLACEHOLDER,
+                "task": "classify_query"
+            },
+            output_schema=_TOON_OUTPUT_SCHEMA,
+            examples=_TOON_EXAMPLES
+        )
+        self._toon_prefix, self._toon_suffix = skeleton.split(_QUERY_PLACEHOLDER, 1)
+
+        # Roteamento é determinístico (temperature=0): queries repetidas
+        # (retries, health checks) reusam a decisão sem novo round-trip ao LLM
+        self._route_cached = functools.lru_cache(maxsize=1024)(self._route_uncached)
+
+        _log.info("[ROUTER] ✓ Router Agent inicializado (TOON: %s)", use_toon)
+        _log.info("[ROUTER] Categorias: CALCULATOR, RAG, WEB_SEARCH, DATETIME, DIRECT")
     
     def route(self, user_query: str) -> Literal["CALCULATOR", "RAG", "WEB_SEARCH", "DATETIME", "DIRECT"]:
         """
@@ -54,118 +186,113 @@ class RouterAgent:
         Returns:
             Uma das categorias: CALCULATOR, RAG, WEB_SEARCH, DATETIME, DIRECT
         """
+        return self._route_cached(user_query.strip())
+
+    def _route_uncached(self, user_query: str) -> str:
+        """
+        Corpo do roteamento sem cache (memoizado via lru_cache no __init__)
+
+        Erros propagam em vez de virar "DIRECT" aqui dentro: o lru_cache
+        não memoiza exceções, então uma falha transitória do provider não
+        prende a query em DIRECT pelo resto do processo. Os chamadores de
+        produção já têm fallback (o nó do router via batcher, route_many).
+        """
+        # Fast-path: casos inequívocos dispensam o round-trip ao LLM
+        if _TIME_FAST_RE.search(user_query):
+            _log.debug("[ROUTER] ⚡ Fast-path: %.50r → DATETIME", user_query)
+            return "DATETIME"
+
+        # Guard de tamanho: "alta confiança" só vale em entradas curtas —
+        # texto longo com um termo matemático solto vai para o LLM
+        if len(user_query) < 60 and _CALC_FAST_RE.search(user_query):
+            _log.debug("[ROUTER] ⚡ Fast-path: %.50r → CALCULATOR", user_query)
+            return "CALCULATOR"
+
+        if self.use_toon:
+            return self._route_with_toon(user_query)
+        return self._route_simple(user_query)
+    
+    def route_many(self, queries: List[str]) -> List[str]:
+        """
+        Classifica N queries em uma única chamada ao LLM
+
+        Amortiza o overhead fixo (RTT de rede, tokens do prompt) entre todas
+        as queries — útil para cargas em lote (pré-classificação de datasets,
+        rajadas de mensagens). Para o caminho online, use route().
+
+        Args:
+            queries: Lista de perguntas dos usuários
+
+        Returns:
+            Lista de categorias, na mesma ordem das queries
+        """
+        if not queries:
+            return []
+
+        if len(queries) == 1:
+            return [self.route(queries[0])]
+
         try:
-            if self.use_toon:
-                return self._route_with_toon(user_query)
-            else:
-                return self._route_simple(user_query)
-                
+            toon_prompt = TOONPromptBuilder.build_structured_prompt(
+                task=self.prompt,
+                input_data={
+                    "queries": list(queries),
+                    "task": "classify_batch"
+                },
+                output_schema={
+                    "results": "array of {category, confidence, reasoning}, one per query, same order"
+                },
+                examples=_TOON_EXAMPLES
+            )
+
+            response = self.llm.invoke(toon_prompt)
+            result = _json_loads(_strip_markdown_fence(response.content))
+
+            categories = []
+            for item in result.get("results", []):
+                category = item.get("category", "DIRECT")
+                categories.append(category if category in _VALID_CATEGORIES else "DIRECT")
+
+            # Garante uma categoria por query mesmo se o LLM truncar a lista
+            while len(categories) < len(queries):
+                categories.append("DIRECT")
+
+            return categories[:len(queries)]
+
         except Exception as e:
-            print(f"[ROUTER] ✗ Erro ao rotear: {str(e)}")
-            return "DIRECT"
-    
+            _log.error("[ROUTER] ✗ Erro no roteamento em lote: %s", e)
+            return ["DIRECT"] * len(queries)
+
     def _route_with_toon(self, user_query: str) -> str:
         """
         Roteamento usando JSON→TOON→JSON (otimizado)
         """
-        # 1. Dados em JSON
-        input_data = {
-            "query": user_query,
-            "task": "classify_query"
-        }
-        
-        output_schema = {
-            "category": "string (CALCULATOR|RAG|WEB_SEARCH|DATETIME|DIRECT)",
-            "confidence": "float (0.0-1.0)",
-            "reasoning": "string (brief explanation)"
-        }
-        
-        # 2. Converte para TOON com exemplos atualizados
-        toon_prompt = TOONPromptBuilder.build_structured_prompt(
-            task=self.prompt,
-            input_data=input_data,
-            output_schema=output_schema,
-            examples=[
-                {
-                    "input": {"query": "Calculate 128 * 46"},
-                    "output": {
-                        "category": "CALCULATOR",
-                        "confidence": 0.98,
-                        "reasoning": "Mathematical operation detected"
-                    }
-                },
-                {
-                    "input": {"query": "Tell me about LLMs in your knowledge base"},
-                    "output": {
-                        "category": "RAG",
-                        "confidence": 0.95,
-                        "reasoning": "Technical topic in internal knowledge base"
-                    }
-                },
-                {
-                    "input": {"query": "Who is the president of Brazil in 2025?"},
-                    "output": {
-                        "category": "WEB_SEARCH",
-                        "confidence": 0.99,
-                        "reasoning": "Current political information requiring web search"
-                    }
-                },
-                {
-                    "input": {"query": "What time is it?"},
-                    "output": {
-                        "category": "DATETIME",
-                        "confidence": 0.99,
-                        "reasoning": "Temporal information request"
-                    }
-                },
-                {
-                    "input": {"query": "Who was Einstein?"},
-                    "output": {
-                        "category": "DIRECT",
-                        "confidence": 0.90,
-                        "reasoning": "Historical general knowledge question"
-                    }
-                },
-                {
-                    "input": {"query": "Latest AI news"},
-                    "output": {
-                        "category": "WEB_SEARCH",
-                        "confidence": 0.97,
-                        "reasoning": "Current news requiring web search"
-                    }
-                }
-            ]
-        )
-        
-        # 3. Envia TOON para LLM
-        messages = [HumanMessage(content=toon_prompt)]
-        response = self.llm.invoke(messages)
+        # 1. Interpola a query no esqueleto TOON pré-construído no __init__
+        toon_prompt = f"{self._toon_prefix}{user_query}{self._toon_suffix}"
+
+        # 2. Envia TOON para LLM — string direta: BaseChatModel aceita str,
+        # dispensando a lista + validação Pydantic de um HumanMessage por chamada
+        response = self.llm.invoke(toon_prompt)
         
-        # 4. Converte resposta de volta para JSON
+        # 3. Converte resposta de volta para JSON
         try:
-            response_text = response.content.strip()
-            
             # Remove markdown code blocks se existirem
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-                response_text = response_text.strip()
-            
-            result = json.loads(response_text)
+            response_text = _strip_markdown_fence(response.content)
+
+            result = _json_loads(response_text)
             category = result.get("category", "DIRECT")
             confidence = result.get("confidence", 0.0)
             reasoning = result.get("reasoning", "")
             
-            print(f"[ROUTER] Query: '{user_query[:50]}...'")
-            print(f"[ROUTER]   → {category} (confidence: {confidence:.2f})")
-            print(f"[ROUTER]   → Reasoning: {reasoning}")
+            _log.debug("[ROUTER] Query: %.50r", user_query)
+            _log.debug("[ROUTER]   → %s (confidence: %.2f)", category, confidence)
+            _log.debug("[ROUTER]   → Reasoning: %s", reasoning)
             
             return category
             
         except json.JSONDecodeError as e:
-            print(f"[ROUTER] ⚠️ Erro ao parsear JSON: {e}")
-            print(f"[ROUTER] Resposta bruta: {response.content[:200]}")
+            _log.warning("[ROUTER] ⚠️ Erro ao parsear JSON: %s", e)
+            _log.warning("[ROUTER] Resposta bruta: %.200s", response.content)
             return self._extract_category_fallback(response.content)
     
     def _route_simple(self, user_query: str) -> str:
@@ -179,11 +306,9 @@ class RouterAgent:
         
         response = self.llm.invoke(messages)
         category = response.content.strip().upper()
-        
-        valid_categories = {"CALCULATOR", "RAG", "WEB_SEARCH", "DATETIME", "DIRECT"}
-        
-        if category in valid_categories:
-            print(f"[ROUTER] Query: '{user_query[:50]}...' → {category}")
+
+        if category in _VALID_CATEGORIES:
+            _log.debug("[ROUTER] Query: %.50r → %s", user_query, category)
             return category
         else:
             return self._extract_category_fallback(category)
@@ -192,15 +317,14 @@ class RouterAgent:
         """
         Extrai categoria do texto quando parsing JSON falha
         """
-        text_upper = text.upper()
-        valid_categories = ["WEB_SEARCH", "CALCULATOR", "DATETIME", "RAG", "DIRECT"]
-        
-        for cat in valid_categories:
-            if cat in text_upper:
-                print(f"[ROUTER] ⚠️ Extraído '{cat}' via fallback")
-                return cat
-        
-        print(f"[ROUTER] ⚠️ Usando DIRECT como fallback final")
+        match = _CATEGORY_RE.search(text)
+
+        if match:
+            category = match.group(0).upper()
+            _log.warning("[ROUTER] ⚠️ Extraído %r via fallback", category)
+            return category
+
+        _log.warning("[ROUTER] ⚠️ Usando DIRECT como fallback final")
         return "DIRECT"
     
     def explain_routing(self, user_query: str) -> dict:
@@ -230,6 +354,93 @@ class RouterAgent:
             "using_toon": self.use_toon
         }
 
+class RouterBatcher:
+    """
+    Coalescedor de classificações concorrentes do Router
+
+    Sob carga multiusuária (várias sessões chegando ao mesmo tempo), cada
+    requisição pagaria seu próprio round-trip ao LLM do Router. O batcher
+    acumula as queries que chegam dentro de uma pequena janela (10 ms) e as
+    classifica todas em uma única chamada via route_many() — o overhead fixo
+    (RTT de rede, tokens do prompt) é amortizado entre o lote inteiro.
+
+    Requisições isoladas não são penalizadas: um lote de tamanho 1 segue o
+    caminho normal de route() (com todos os seus fast-paths e caches).
+
+    O estado (fila + drainer) é por event loop: futures e asyncio.Queue não
+    são thread-safe, então compartilhá-los entre loops (um por thread de
+    servidor) deixaria um drainer resolver futures presos a outro loop. A
+    coalescência acontece entre as requisições do mesmo loop — que é o caso
+    do loop dedicado do SuperAgent, por onde passam todos os turnos.
+    """
+
+    def __init__(self, router: "RouterAgent", window: float = 0.01, max_batch: int = 16):
+        """
+        Args:
+            router: RouterAgent que executa as classificações
+            window: Janela de coalescência em segundos
+            max_batch: Máximo de queries por chamada ao LLM
+        """
+        self.router = router
+        self.window = window
+        self.max_batch = max_batch
+        # loop → {"queue": asyncio.Queue, "drainer": asyncio.Task}; weak
+        # para não segurar loops efêmeros (asyncio.run) vivos
+        self._per_loop = weakref.WeakKeyDictionary()
+
+    async def classify(self, user_query: str) -> str:
+        """
+        Enfileira a query e aguarda a categoria do próximo lote
+
+        Returns:
+            Uma das categorias: CALCULATOR, RAG, WEB_SEARCH, DATETIME, DIRECT
+        """
+        loop = asyncio.get_running_loop()
+        state = self._per_loop.get(loop)
+        if state is None:
+            state = self._per_loop[loop] = {"queue": asyncio.Queue(), "drainer": None}
+
+        future = loop.create_future()
+        await state["queue"].put((user_query, future))
+
+        # Drainer sob demanda: criado dentro do loop em execução (o __init__
+        # pode rodar fora de qualquer event loop) e morre quando a fila esvazia
+        drainer = state["drainer"]
+        if drainer is None or drainer.done():
+            state["drainer"] = asyncio.create_task(self._drain(state["queue"]))
+
+        return await future
+
+    async def _drain(self, queue: asyncio.Queue):
+        """Espera a janela, esvazia a fila e resolve os futures em lote"""
+        while True:
+            await asyncio.sleep(self.window)
+
+            batch = []
+            while not queue.empty() and len(batch) < self.max_batch:
+                batch.append(queue.get_nowait())
+
+            if not batch:
+                return
+
+            queries = [query for query, _ in batch]
+            try:
+                if len(queries) == 1:
+                    # Requisição solitária: mantém fast-paths e lru_cache
+                    categories = [await asyncio.to_thread(self.router.route, queries[0])]
+                else:
+                    categories = await asyncio.to_thread(self.router.route_many, queries)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), category in zip(batch, categories):
+                if not future.done():
+                    future.set_result(category)
+
+
 if __name__ == "__main__":
     # Testes do router
     router = RouterAgent()
@@ -0,0 +1,97 @@
+import logging
+from typing import List, Optional
+
+# faiss/numpy são dependências do RAG (requirements.txt); se ausentes,
+# o cache vira no-op e o Router segue pelo caminho normal via LLM
+try:
+    import faiss
+    import numpy as np
+except ImportError:
+    faiss = None
+    np = None
+
+_log = logging.getLogger(__name__)
+
+
+class SemanticRouterCache:
+    """
+    Cache semântico para decisões do Router
+
+    Perguntas parafraseadas ("que horas são?" vs "me diga a hora") geram o
+    mesmo rótulo, mas um cache exato não as reconhece. Aqui a busca é por
+    similaridade de cosseno sobre embeddings normalizados (FAISS IndexFlatIP):
+    um hit troca a chamada do LLM do Router (~500 ms) por uma chamada de
+    embedding (~50 ms) + busca vetorial local.
+    """
+
+    def __init__(self, threshold: float = 0.92, embedding_function=None):
+        """
+        Args:
+            threshold: Similaridade de cosseno mínima para considerar hit
+            embedding_function: Modelo de embeddings. Se None, usa
+                OpenAIEmbeddings com o modelo configurado em settings
+        """
+        self.threshold = threshold
+        self._embedding_function = embedding_function
+        self._index = None
+        self._categories: List[str] = []
+
+    def _get_embedding_function(self):
+        """Retorna instância única do modelo de embeddings (lazy)"""
+        if self._embedding_function is None:
+            from langchain_openai import OpenAIEmbeddings
+            from config.settings import settings
+            self._embedding_function = OpenAIEmbeddings(model=settings.EMBEDDING_MODEL)
+        return self._embedding_function
+
+    def _embed(self, text: str):
+        """Embedding L2-normalizado (produto interno == cosseno)"""
+        vector = np.asarray(
+            self._get_embedding_function().embed_query(text),
+            dtype="float32"
+        ).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def get(self, query: str) -> Optional[str]:
+        """
+        Busca a categoria de uma query semanticamente equivalente
+
+        Returns:
+            Categoria cacheada, ou None em caso de miss
+        """
+        if faiss is None or self._index is None or not self._categories:
+            return None
+
+        try:
+            vector = self._embed(query)
+            distances, indices = self._index.search(vector, 1)
+
+            if distances[0, 0] >= self.threshold:
+                category = self._categories[indices[0, 0]]
+                _log.debug("[SEMANTIC CACHE] Hit (%.3f): %.50r → %s",
+                           distances[0, 0], query, category)
+                return category
+
+            return None
+
+        except Exception as e:
+            _log.debug("[SEMANTIC CACHE] Lookup falhou, seguindo sem cache: %s", e)
+            return None
+
+    def add(self, query: str, category: str):
+        """Registra a decisão do Router para queries futuras similares"""
+        if faiss is None:
+            return
+
+        try:
+            vector = self._embed(query)
+
+            if self._index is None:
+                self._index = faiss.IndexFlatIP(vector.shape[1])
+
+            self._index.add(vector)
+            self._categories.append(category)
+
+        except Exception as e:
+            _log.debug("[SEMANTIC CACHE] Add falhou: %s", e)
@@ -1,22 +1,102 @@
+import asyncio
+import logging
+import re
+import threading
 from typing import Annotated, List, Dict, Any, Literal
 from typing_extensions import TypedDict
-from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
+import aiosqlite
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage, ToolMessage, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.types import CachePolicy
+from langgraph.cache.memory import InMemoryCache
 from config.llm_factory import llm_factory
+from config.settings import settings
 from tools.calculator_tool import calculator
-from tools.rag_tool import search_knowledge_base
+from tools.rag_tool import search_knowledge_base, search_knowledge_base_batch
 from tools.datetime_tool import get_current_datetime, calculate_date_difference
 from tools.web_search_tool import web_search
 from agents.guardrails import InputGuardrails, OutputGuardrails, ConversationGuardrails
-from agents.router_agent import RouterAgent
+from agents.router_agent import RouterAgent, RouterBatcher, _CALC_FAST_RE, _TIME_FAST_RE
+from agents.semantic_cache import SemanticRouterCache
 from prompts.system_prompts import get_super_agent_prompt, get_rag_agent_prompt
+from langchain_core.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
+
+# Cache de LLM transparente no nível do BaseChatModel: chamadas idênticas
+# (prompt, modelo, temperature) retornam do SQLite em ~0 ms em vez de pagar
+# o round-trip da API. Ideal para o Router (temperature=0, entradas curtas)
+# e perguntas repetidas no agente DIRECT.
+set_llm_cache(SQLiteCache(database_path=".langchain_cache.db"))
+
+# Pré-filtro dos guardrails de entrada: mensagens curtas só com caracteres
+# benignos pulam o pipeline completo de validação/moderação. A classe não
+# contém '<', '=' nem ':' — sem eles nenhum dos padrões de injection
+# vigiados (javascript:, <script>, on*=) é formável
+_FAST_PATH_RE = re.compile(r"^(?=.*\w)[\w\s.,?!¿¡\-]{1,500}$")
+
+# Logger lazy (mesmo padrão do router): nada de writes síncronos em stdout
+# no caminho quente — sob Streamlit, print é capturado em buffers de sessão
+_log = logging.getLogger(__name__)
+
+# Conjuntos de ferramentas por agente: tuplas imutáveis no módulo,
+# compartilhadas por todas as instâncias (nada a realocar por __init__)
+CALC_TOOLS = (calculator,)
+RAG_TOOLS = (search_knowledge_base, search_knowledge_base_batch)
+WEB_TOOLS = (web_search,)
+DT_TOOLS = (get_current_datetime, calculate_date_difference)
+
+# Saudações/cortesias comuns: ~20-30% dos turnos em chat casual — roteadas
+# a DIRECT por regra, com custo zero de rede
+_GREETINGS = frozenset({
+    "oi", "olá", "ola", "hello", "hi", "oi tudo bem", "olá tudo bem",
+    "obrigado", "obrigada", "valeu", "tchau", "até mais",
+    "bom dia", "boa tarde", "boa noite"
+})
+
+
+def _rule_route(text: str):
+    """
+    Prefiltro de roteamento baseado em regras (sem LLM)
+
+    Cobre os casos inequívocos — saudações, matemática explícita, perguntas
+    de data/hora curtas — reusando os mesmos regexes fast-path do Router.
+    Retorna a categoria ou None para cair no roteamento completo.
+    """
+    normalized = text.strip(" !?.,").lower()
+    if normalized in _GREETINGS:
+        return "DIRECT"
+    # DATETIME antes de CALCULATOR, na mesma ordem do fast-path do Router:
+    # os padrões se sobrepõem ("calcule os dias entre ...") e a pergunta é
+    # de datas — as ferramentas de data vivem no agente DATETIME
+    if len(text) < 60 and _TIME_FAST_RE.search(text):
+        return "DATETIME"
+    if len(text) < 60 and _CALC_FAST_RE.search(text):
+        return "CALCULATOR"
+    return None
+
+# Limite do histórico mantido no estado (o LangGraph exige reducers com a
+# assinatura exata (a, b) — o limite não pode ser parâmetro do reducer)
+_HISTORY_LIMIT = 40
+
+def _bounded_add(left, right):
+    """
+    Reducer de mensagens com histórico limitado
+
+    add_messages acumula indefinidamente e o checkpointer serializa o estado
+    inteiro a cada superstep — O(N²) no total da sessão. Manter só as últimas
+    _HISTORY_LIMIT mensagens limita o tamanho do checkpoint (escrita O(1))
+    sem afetar o prompt, que já passa pela janela de trim_messages.
+    """
+    merged = add_messages(left, right)
+    return merged[-_HISTORY_LIMIT:]
+
 
 class AgentState(TypedDict):
     """Estado do agente com mensagens e contexto"""
-    messages: Annotated[List[BaseMessage], add_messages]
+    messages: Annotated[List[BaseMessage], _bounded_add]
     category: str
     error_count: int
     conversation_metadata: Dict[str, Any]
@@ -36,37 +116,102 @@ class SuperAgent:
         """
         # LLM principal
         self.llm = llm_factory.create_llm(provider=provider, model=model, temperature=temperature)
+        self._provider = provider
+        self._model = model
+        self._temperature = temperature if temperature is not None else settings.TEMPERATURE
         
         # Router Agent
         self.router = RouterAgent(provider=provider)
+
+        # Cache semântico: perguntas parafraseadas reusam a decisão do Router
+        self.router_cache = SemanticRouterCache()
+
+        # Coalesce classificações concorrentes (multiusuário) em uma única
+        # chamada ao LLM do Router dentro de uma janela de 10 ms
+        self.router_batcher = RouterBatcher(self.router)
         
-        # Ferramentas disponíveis
-        self.tools = {
-            "calculator": calculator,
-            "rag": search_knowledge_base,
-            "datetime": [get_current_datetime, calculate_date_difference],
-            "web_search": web_search  # NOVA FERRAMENTA
+        # Runnables com ferramentas já vinculadas: bind_tools serializa os
+        # schemas das ferramentas para JSON Schema — fazemos isso uma vez
+        # aqui em vez de a cada invocação de nó
+        self._llm_calc = self.llm.bind_tools(list(CALC_TOOLS))
+        self._llm_rag = self.llm.bind_tools(list(RAG_TOOLS))
+        self._llm_web = self.llm.bind_tools(list(WEB_TOOLS))
+        self._llm_dt = self.llm.bind_tools(list(DT_TOOLS))
+
+        # SystemMessages pré-construídas uma única vez: evita reler o prompt
+        # do disco e reconcatenar o sufixo de categoria a cada turno, e a
+        # identidade estável dos objetos ajuda o cache de LLM
+        base_prompt = get_super_agent_prompt()
+        self._sys_msgs = {
+            "calculator": SystemMessage(content=base_prompt + "\n\nCATEGORIA: CALCULATOR - Use a ferramenta calculator."),
+            "rag": SystemMessage(content=get_rag_agent_prompt()),
+            "web_search": SystemMessage(content=base_prompt + """
+
+CATEGORIA: WEB_SEARCH - Use a ferramenta web_search para buscar informações atuais.
+
+IMPORTANTE:
+- Sempre cite as fontes (URLs) das informações
+- Indique quando a pesquisa foi realizada
+- Sintetize informações de múltiplas fontes quando relevante
+- Se encontrar informações conflitantes, mencione isso
+"""),
+            "datetime": SystemMessage(content=base_prompt + "\n\nCATEGORIA: DATETIME - Use as ferramentas de data/hora."),
+            "direct": SystemMessage(content=base_prompt + "\n\nCATEGORIA: DIRECT - Responda diretamente usando seu conhecimento.")
         }
-        
+
+        # Janela deslizante de histórico: limita os tokens enviados ao LLM
+        # por turno — o custo e a latência param de crescer linearmente com
+        # o tamanho da conversa
+        self._trim = trim_messages(
+            max_tokens=3000,
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            start_on="human",
+            allow_partial=False
+        )
+
+        # Tarefas especulativas do agente DIRECT, por id da mensagem do usuário
+        self._speculative_tasks = {}
+
         # Guardrails
         self.input_guardrails = InputGuardrails()
         self.output_guardrails = OutputGuardrails()
         self.conversation_guardrails = ConversationGuardrails()
-        
+
+        # Event loop dedicado do agente, num thread de fundo: todos os turnos
+        # (vindos de qualquer thread do Flask/Streamlit) executam aqui. Um
+        # único loop persistente é o que o AsyncSqliteSaver exige (conexão e
+        # locks presos ao loop de criação) — e dispensa o asyncio.run por
+        # turno, que criava e destruía um loop a cada mensagem.
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, name="super-agent-loop", daemon=True
+        ).start()
+
         # Constrói o grafo
         self.graph = self._build_graph()
         
-        print(f"[SUPER AGENT] ✓ Inicializado com Router + Ferramentas especializadas")
-        print(f"[SUPER AGENT] Provider: {llm_factory.get_provider_info()['provider']}")
-        print(f"[SUPER AGENT] Ferramentas: CALCULATOR, RAG, WEB_SEARCH, DATETIME, DIRECT")
+        _log.info("[SUPER AGENT] ✓ Inicializado com Router + Ferramentas especializadas")
+        _log.info("[SUPER AGENT] Provider: %s", llm_factory.get_provider_info()["provider"])
+        _log.info("[SUPER AGENT] Ferramentas: CALCULATOR, RAG, WEB_SEARCH, DATETIME, DIRECT")
     
     def _build_graph(self) -> StateGraph:
         """Constrói o grafo de execução do agente com Router"""
         
         workflow = StateGraph(AgentState)
-        
+
+        # Cache por nó: entradas idênticas reusam a saída sem repetir a
+        # chamada de LLM. Só o router é cacheável: sua saída ({"category"})
+        # não carrega mensagens. Nós que emitem AIMessage/ToolMessage ficam
+        # de fora — replayar mensagens cacheadas repete seus ids e o reducer
+        # (add_messages faz upsert por id) descartaria o novo turno.
+        deterministic_cache = CachePolicy(
+            ttl=3600,
+            key_func=lambda state: state["messages"][-1].content if state["messages"] else ""
+        )
+
         # Adiciona nós
-        workflow.add_node("router", self._router_node)
+        workflow.add_node("router", self._router_node, cache_policy=deterministic_cache)
         workflow.add_node("calculator_agent", self._calculator_agent_node)
         workflow.add_node("rag_agent", self._rag_agent_node)
         workflow.add_node("web_search_agent", self._web_search_agent_node)  # NOVO NÓ
@@ -96,29 +241,83 @@ class SuperAgent:
         workflow.add_edge("datetime_agent", END)
         workflow.add_edge("direct_agent", END)
         
-        # Compila com memória
-        memory = MemorySaver()
-        return workflow.compile(checkpointer=memory)
+        # Compila com memória persistente e cache de nós. AsyncSqliteSaver
+        # mantém os checkpoints em disco (RSS não cresce com as conversas,
+        # threads sobrevivem a restarts) e é o único compatível com os
+        # caminhos ainvoke/astream — o SqliteSaver síncrono lança
+        # NotImplementedError em aget_tuple. Construção dentro do loop
+        # dedicado: o saver se prende ao loop em que nasce.
+        async def _make_saver():
+            return AsyncSqliteSaver(aiosqlite.connect(".langgraph_checkpoints.db"))
+
+        memory = self._submit(_make_saver()).result()
+        return workflow.compile(checkpointer=memory, cache=InMemoryCache())
+
+    def _submit(self, coro) -> "asyncio.Future":
+        """Agenda uma corrotina no loop dedicado do agente"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
     
-    def _router_node(self, state: AgentState) -> Dict[str, Any]:
+    async def _router_node(self, state: AgentState) -> Dict[str, Any]:
         """
         Nó do Router que classifica a pergunta
+
+        Com SPECULATIVE_ROUTE ativo, o agente DIRECT (rota mais comum) é
+        iniciado em paralelo com a classificação: se o Router confirmar
+        DIRECT, a resposta especulativa já está (quase) pronta e a latência
+        do turno cai pela metade; senão a tarefa é cancelada.
         """
+        speculative_task = None
+
         try:
-            user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
-            
-            if not user_messages:
+            # Varredura reversa: para na primeira HumanMessage em vez de
+            # materializar uma lista com todas elas a cada turno
+            last_user = None
+            for msg in reversed(state["messages"]):
+                if isinstance(msg, HumanMessage):
+                    last_user = msg
+                    break
+
+            if last_user is None:
                 return {"category": "DIRECT"}
-            
-            last_user_message = user_messages[-1].content
-            
-            # Classifica usando o Router
-            category = self.router.route(last_user_message)
-            
+
+            # Regras primeiro: saudações e casos inequívocos nem tocam o
+            # cache semântico ou o LLM do Router
+            rule_category = _rule_route(last_user.content)
+            if rule_category is not None:
+                return {"category": rule_category}
+
+            if settings.SPECULATIVE_ROUTE:
+                speculative_task = asyncio.create_task(self._direct_agent_node(state))
+
+            # Cache semântico: perguntas similares já classificadas não
+            # pagam a chamada ao LLM do Router. get/add fazem embed_query —
+            # um round-trip HTTP síncrono — e rodam num thread do executor:
+            # no loop único do agente, bloqueá-lo aqui travaria os turnos
+            # concorrentes de todas as sessões
+            category = await asyncio.to_thread(self.router_cache.get, last_user.content)
+
+            if category is None:
+                # Classifica via batcher: requisições concorrentes de outras
+                # sessões que cheguem na mesma janela compartilham a chamada.
+                # Falhas propagam (não viram "DIRECT" aqui): o except abaixo
+                # responde DIRECT sem poluir o índice semântico, que não tem
+                # TTL nem invalidação
+                category = await self.router_batcher.classify(last_user.content)
+                await asyncio.to_thread(self.router_cache.add, last_user.content, category)
+
+            if speculative_task is not None:
+                if category == "DIRECT":
+                    # O nó DIRECT consome a resposta especulativa
+                    self._speculative_tasks[last_user.id or id(last_user)] = speculative_task
+                else:
+                    speculative_task.cancel()
+
             return {"category": category}
             
         except Exception as e:
-            print(f"[ROUTER NODE] ✗ Erro: {str(e)}")
+            if speculative_task is not None:
+                speculative_task.cancel()
+            _log.exception("[ROUTER NODE] ✗ Erro: %s", e)
             return {"category": "DIRECT"}
     
     def _route_to_agent(self, state: AgentState) -> Literal["CALCULATOR", "RAG", "WEB_SEARCH", "DATETIME", "DIRECT"]:
@@ -128,121 +327,138 @@ class SuperAgent:
         category = state.get("category", "DIRECT")
         return category
     
-    def _calculator_agent_node(self, state: AgentState) -> Dict[str, Any]:
+    async def _execute_tool_calls(self, response, tools) -> List[ToolMessage]:
+        """
+        Executa os tool_calls de uma resposta concorrentemente
+
+        Chamadas independentes (o caso comum: o LLM emite N buscas ou N
+        cálculos de uma vez) rodam em paralelo via asyncio.gather — a
+        latência do turno cai de soma(t_i) para max(t_i).
+        """
+        tools_by_name = {t.name: t for t in tools}
+
+        async def run_one(tool_call):
+            tool = tools_by_name.get(tool_call["name"])
+            if tool is None:
+                content = f"Erro: ferramenta '{tool_call['name']}' desconhecida"
+            else:
+                try:
+                    content = str(await tool.ainvoke(tool_call["args"]))
+                except Exception as e:
+                    content = self.output_guardrails.handle_error_gracefully(e, tool_call["name"])
+            return ToolMessage(content=content, tool_call_id=tool_call["id"])
+
+        return list(await asyncio.gather(*(run_one(tc) for tc in response.tool_calls)))
+
+    async def _calculator_agent_node(self, state: AgentState) -> Dict[str, Any]:
         """Agente especializado em cálculos matemáticos"""
         try:
-            llm_with_calc = self.llm.bind_tools([calculator])
-            system_msg = SystemMessage(content=get_super_agent_prompt() + "\n\nCATEGORIA: CALCULATOR - Use a ferramenta calculator.")
-            messages = [system_msg] + state["messages"]
+            llm_with_calc = self._llm_calc
+            system_msg = self._sys_msgs["calculator"]
+            messages = [system_msg] + self._trim.invoke(state["messages"])
             
-            response = llm_with_calc.invoke(messages)
+            response = await llm_with_calc.ainvoke(messages)
             
             if response.tool_calls:
-                tool_node = ToolNode([calculator])
-                tool_result = tool_node.invoke({"messages": [response]})
-                messages_with_result = messages + [response] + tool_result["messages"]
-                final_response = self.llm.invoke(messages_with_result)
-                return {"messages": [response] + tool_result["messages"] + [final_response]}
+                tool_messages = await self._execute_tool_calls(response, CALC_TOOLS)
+                messages_with_result = messages + [response] + tool_messages
+                final_response = await self.llm.ainvoke(messages_with_result)
+                return {"messages": [response] + tool_messages + [final_response]}
             else:
                 return {"messages": [response]}
                 
         except Exception as e:
-            print(f"[CALCULATOR AGENT] ✗ Erro: {str(e)}")
+            _log.exception("[CALCULATOR AGENT] ✗ Erro: %s", e)
             error_msg = self.output_guardrails.handle_error_gracefully(e, "calculator_agent")
             return {"messages": [AIMessage(content=error_msg)]}
     
-    def _rag_agent_node(self, state: AgentState) -> Dict[str, Any]:
+    async def _rag_agent_node(self, state: AgentState) -> Dict[str, Any]:
         """Agente especializado em busca RAG"""
         try:
-            llm_with_rag = self.llm.bind_tools([search_knowledge_base])
-            system_msg = SystemMessage(content=get_rag_agent_prompt())
-            messages = [system_msg] + state["messages"]
+            llm_with_rag = self._llm_rag
+            system_msg = self._sys_msgs["rag"]
+            messages = [system_msg] + self._trim.invoke(state["messages"])
             
-            response = llm_with_rag.invoke(messages)
+            response = await llm_with_rag.ainvoke(messages)
             
             if response.tool_calls:
-                tool_node = ToolNode([search_knowledge_base])
-                tool_result = tool_node.invoke({"messages": [response]})
-                messages_with_result = messages + [response] + tool_result["messages"]
-                final_response = self.llm.invoke(messages_with_result)
-                return {"messages": [response] + tool_result["messages"] + [final_response]}
+                tool_messages = await self._execute_tool_calls(response, RAG_TOOLS)
+                messages_with_result = messages + [response] + tool_messages
+                final_response = await self.llm.ainvoke(messages_with_result)
+                return {"messages": [response] + tool_messages + [final_response]}
             else:
                 return {"messages": [response]}
                 
         except Exception as e:
-            print(f"[RAG AGENT] ✗ Erro: {str(e)}")
+            _log.exception("[RAG AGENT] ✗ Erro: %s", e)
             error_msg = self.output_guardrails.handle_error_gracefully(e, "rag_agent")
             return {"messages": [AIMessage(content=error_msg)]}
     
-    def _web_search_agent_node(self, state: AgentState) -> Dict[str, Any]:
+    async def _web_search_agent_node(self, state: AgentState) -> Dict[str, Any]:
         """
         NOVO: Agente especializado em pesquisa web para informações atuais
         """
         try:
-            llm_with_web = self.llm.bind_tools([web_search])
+            llm_with_web = self._llm_web
+            system_msg = self._sys_msgs["web_search"]
+            messages = [system_msg] + self._trim.invoke(state["messages"])
             
-            system_msg = SystemMessage(content=get_super_agent_prompt() + """
-
-CATEGORIA: WEB_SEARCH - Use a ferramenta web_search para buscar informações atuais.
-
-IMPORTANTE:
-- Sempre cite as fontes (URLs) das informações
-- Indique quando a pesquisa foi realizada
-- Sintetize informações de múltiplas fontes quando relevante
-- Se encontrar informações conflitantes, mencione isso
-""")
-            messages = [system_msg] + state["messages"]
-            
-            response = llm_with_web.invoke(messages)
+            response = await llm_with_web.ainvoke(messages)
             
             if response.tool_calls:
-                tool_node = ToolNode([web_search])
-                tool_result = tool_node.invoke({"messages": [response]})
-                messages_with_result = messages + [response] + tool_result["messages"]
-                final_response = self.llm.invoke(messages_with_result)
-                return {"messages": [response] + tool_result["messages"] + [final_response]}
+                tool_messages = await self._execute_tool_calls(response, WEB_TOOLS)
+                messages_with_result = messages + [response] + tool_messages
+                final_response = await self.llm.ainvoke(messages_with_result)
+                return {"messages": [response] + tool_messages + [final_response]}
             else:
                 return {"messages": [response]}
                 
         except Exception as e:
-            print(f"[WEB SEARCH AGENT] ✗ Erro: {str(e)}")
+            _log.exception("[WEB SEARCH AGENT] ✗ Erro: %s", e)
             error_msg = self.output_guardrails.handle_error_gracefully(e, "web_search_agent")
             return {"messages": [AIMessage(content=error_msg)]}
     
-    def _datetime_agent_node(self, state: AgentState) -> Dict[str, Any]:
+    async def _datetime_agent_node(self, state: AgentState) -> Dict[str, Any]:
         """Agente especializado em data/hora"""
         try:
-            datetime_tools = [get_current_datetime, calculate_date_difference]
-            llm_with_datetime = self.llm.bind_tools(datetime_tools)
-            system_msg = SystemMessage(content=get_super_agent_prompt() + "\n\nCATEGORIA: DATETIME - Use as ferramentas de data/hora.")
-            messages = [system_msg] + state["messages"]
+            llm_with_datetime = self._llm_dt
+            system_msg = self._sys_msgs["datetime"]
+            messages = [system_msg] + self._trim.invoke(state["messages"])
             
-            response = llm_with_datetime.invoke(messages)
+            response = await llm_with_datetime.ainvoke(messages)
             
             if response.tool_calls:
-                tool_node = ToolNode(datetime_tools)
-                tool_result = tool_node.invoke({"messages": [response]})
-                messages_with_result = messages + [response] + tool_result["messages"]
-                final_response = self.llm.invoke(messages_with_result)
-                return {"messages": [response] + tool_result["messages"] + [final_response]}
+                tool_messages = await self._execute_tool_calls(response, DT_TOOLS)
+                messages_with_result = messages + [response] + tool_messages
+                final_response = await self.llm.ainvoke(messages_with_result)
+                return {"messages": [response] + tool_messages + [final_response]}
             else:
                 return {"messages": [response]}
                 
         except Exception as e:
-            print(f"[DATETIME AGENT] ✗ Erro: {str(e)}")
+            _log.exception("[DATETIME AGENT] ✗ Erro: %s", e)
             error_msg = self.output_guardrails.handle_error_gracefully(e, "datetime_agent")
             return {"messages": [AIMessage(content=error_msg)]}
     
-    def _direct_agent_node(self, state: AgentState) -> Dict[str, Any]:
+    async def _direct_agent_node(self, state: AgentState) -> Dict[str, Any]:
         """Agente para respostas diretas sem ferramentas"""
+        # Reusa a resposta especulativa iniciada junto com o Router, se houver
+        last_message = state["messages"][-1] if state["messages"] else None
+        if last_message is not None:
+            speculative_task = self._speculative_tasks.pop(
+                last_message.id or id(last_message), None
+            )
+            if speculative_task is not None:
+                return await speculative_task
+
         try:
-            system_msg = SystemMessage(content=get_super_agent_prompt() + "\n\nCATEGORIA: DIRECT - Responda diretamente usando seu conhecimento.")
-            messages = [system_msg] + state["messages"]
-            response = self.llm.invoke(messages)
+            system_msg = self._sys_msgs["direct"]
+            messages = [system_msg] + self._trim.invoke(state["messages"])
+            response = await self.llm.ainvoke(messages)
             return {"messages": [response]}
                 
         except Exception as e:
-            print(f"[DIRECT AGENT] ✗ Erro: {str(e)}")
+            _log.exception("[DIRECT AGENT] ✗ Erro: %s", e)
             error_msg = self.output_guardrails.handle_error_gracefully(e, "direct_agent")
             return {"messages": [AIMessage(content=error_msg)]}
     
@@ -251,38 +467,61 @@ IMPORTANTE:
         user_input: str, 
         thread_id: str = "default",
         debug: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Wrapper síncrono de aprocess_message (para scripts e CLIs)
+
+        O turno roda no loop dedicado do agente — requisições concorrentes
+        de várias threads compartilham o mesmo loop (e o checkpointer).
+        """
+        return self._submit(
+            self.aprocess_message(user_input, thread_id=thread_id, debug=debug)
+        ).result()
+    
+    async def aprocess_message(
+        self, 
+        user_input: str, 
+        thread_id: str = "default",
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Processa uma mensagem do usuário com Router e Guardrails
+
+        Totalmente assíncrono: as chamadas de LLM (network-bound) liberam o
+        event loop para atender outras requisições enquanto aguardam a API.
         """
         
         # INPUT GUARDRAILS
-        validation = self.input_guardrails.validate_input(user_input)
-        
-        if not validation["valid"]:
-            return {
-                "success": False,
-                "response": validation["message"],
-                "error": "input_validation_failed"
-            }
-        
-        sanitized_input = validation["sanitized_input"]
-        
-        appropriateness = self.input_guardrails.check_message_appropriateness(sanitized_input)
-        
-        if not appropriateness["appropriate"]:
-            return {
-                "success": False,
-                "response": "Desculpe, não posso processar esse tipo de conteúdo.",
-                "error": appropriateness["reason"]
-            }
+        # Fast-path: entradas trivialmente limpas pulam o pipeline completo
+        if user_input and _FAST_PATH_RE.match(user_input):
+            sanitized_input = user_input.strip()
+        else:
+            validation = self.input_guardrails.validate_input(user_input)
+
+            if not validation.valid:
+                return {
+                    "success": False,
+                    "response": validation.message,
+                    "error": "input_validation_failed"
+                }
+
+            sanitized_input = validation.sanitized_input
+
+            appropriateness = self.input_guardrails.check_message_appropriateness(sanitized_input)
+
+            if not appropriateness.appropriate:
+                return {
+                    "success": False,
+                    "response": "Desculpe, não posso processar esse tipo de conteúdo.",
+                    "error": appropriateness.reason
+                }
         
         config = {"configurable": {"thread_id": thread_id}}
         
         try:
             input_messages = [HumanMessage(content=sanitized_input)]
             
-            result = self.graph.invoke(
+            result = await self.graph.ainvoke(
                 {
                     "messages": input_messages,
                     "category": "",
@@ -307,18 +546,18 @@ IMPORTANTE:
             output_validation = self.output_guardrails.validate_output(final_response)
             conversation_check = self.conversation_guardrails.check_conversation_length(messages)
             
-            if conversation_check["warning"]:
-                final_response += f"\n\n💡 {conversation_check['warning']}"
+            if conversation_check.warning:
+                final_response += f"\n\n💡 {conversation_check.warning}"
             
             if self.conversation_guardrails.detect_loops(messages):
                 final_response += "\n\n⚠️ Parece que estamos em um padrão repetitivo. Posso ajudar com algo diferente?"
             
             response_dict = {
                 "success": True,
-                "response": output_validation["processed_response"],
+                "response": output_validation.processed_response,
                 "category": category,
                 "metadata": {
-                    "message_count": conversation_check["message_count"],
+                    "message_count": conversation_check.message_count,
                     "provider": llm_factory.get_provider_info()["provider"]
                 }
             }
@@ -332,7 +571,7 @@ IMPORTANTE:
             return response_dict
             
         except Exception as e:
-            print(f"[SUPER AGENT] ✗ Erro ao processar mensagem: {str(e)}")
+            _log.exception("[SUPER AGENT] ✗ Erro ao processar mensagem: %s", e)
             error_message = self.output_guardrails.handle_error_gracefully(e, "process_message")
             return {
                 "success": False,
@@ -341,6 +580,59 @@ IMPORTANTE:
                 "category": "ERROR"
             }
     
+    async def astream_message(self, user_input: str, thread_id: str = "default"):
+        """
+        Gera a resposta em chunks de texto (streaming token a token)
+
+        O primeiro token chega em ~200 ms, eliminando a espera percebida
+        pela resposta completa. Guardrails de entrada são aplicados antes
+        de tocar o grafo.
+        """
+        validation = self.input_guardrails.validate_input(user_input)
+
+        if not validation.valid:
+            yield validation.message
+            return
+
+        config = {"configurable": {"thread_id": thread_id}}
+
+        async for chunk, _metadata in self.graph.astream(
+            {
+                "messages": [HumanMessage(content=validation.sanitized_input)],
+                "category": "",
+                "error_count": 0,
+                "conversation_metadata": {}
+            },
+            config=config,
+            stream_mode="messages"
+        ):
+            # Só repassa conteúdo de AIMessage (chunks de tool call vêm vazios)
+            if isinstance(chunk, AIMessage) and chunk.content:
+                yield chunk.content
+
+    def stream_message(self, user_input: str, thread_id: str = "default"):
+        """
+        Wrapper síncrono de astream_message (ex.: st.write_stream)
+
+        Cada chunk é bombeado do loop dedicado do agente — mesmo loop (e
+        checkpointer) dos demais caminhos de invocação.
+        """
+        agen = self.astream_message(user_input, thread_id=thread_id)
+        while True:
+            try:
+                yield self._submit(agen.__anext__()).result()
+            except StopAsyncIteration:
+                break
+
+    def get_last_category(self, thread_id: str = "default") -> str:
+        """Retorna a categoria roteada no último turno da thread"""
+        try:
+            config = {"configurable": {"thread_id": thread_id}}
+            state = self.graph.get_state(config)
+            return state.values.get("category", "UNKNOWN")
+        except Exception:
+            return "UNKNOWN"
+
     def get_conversation_history(self, thread_id: str = "default") -> List[BaseMessage]:
         """Recupera o histórico de conversação"""
         try:
@@ -348,12 +640,12 @@ IMPORTANTE:
             state = self.graph.get_state(config)
             return state.values.get("messages", [])
         except Exception as e:
-            print(f"[SUPER AGENT] ✗ Erro ao recuperar histórico: {str(e)}")
+            _log.exception("[SUPER AGENT] ✗ Erro ao recuperar histórico: %s", e)
             return []
     
     def clear_conversation(self, thread_id: str = "default"):
         """Limpa a conversa de uma thread"""
-        print(f"[SUPER AGENT] Conversa limpa para thread: {thread_id}")
+        _log.info("[SUPER AGENT] Conversa limpa para thread: %s", thread_id)
 
 if __name__ == "__main__":
     agent = SuperAgent()
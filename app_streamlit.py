@@ -1,10 +1,19 @@
+import logging
+import re
 import streamlit as st
 import time
+import uuid
+from collections import OrderedDict
+from string import Template
 from agents.super_agent import SuperAgent
 from config.settings import settings
 from config.llm_factory import llm_factory
 import os
 
+# Silencia logs informativos dos agentes no caminho quente da UI:
+# só warnings/erros chegam ao stdout capturado pelo Streamlit
+logging.getLogger("agents").setLevel(logging.WARNING)
+
 # Configuração da página
 st.set_page_config(
     page_title="Super AI Agent",
@@ -13,11 +22,109 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS customizado
-def load_css(file_path):
+# Agente compartilhado processo-wide: evita recompilar o StateGraph e
+# refazer handshakes TLS dos clientes LLM a cada sessão/rerun. O isolamento
+# entre usuários continua garantido pelo thread_id por sessão no MemorySaver.
+# A temperatura faz parte da chave: a instância é compartilhada entre
+# sessões, então mutá-la por sessão vazaria o slider de um usuário para os
+# outros — cada combinação (provider, model, temperature) tem seu agente,
+# e valores já visitados voltam do cache sem rebuild.
+@st.cache_resource(show_spinner=False)
+def get_agent(provider: str, model: str, temperature: float) -> SuperAgent:
+    return SuperAgent(provider=provider, model=model, temperature=temperature)
+
+# Templates de HTML do chat construídos uma vez no import. A cada rerun o
+# Streamlit re-renderiza TODO o histórico: formatar N f-strings multilinha
+# por envio cresce linearmente com a conversa. Cada mensagem tem seu HTML
+# renderizado uma única vez (no append) e cacheado em st.session_state.
+_USER_MSG_TMPL = Template("""
+<div class="chat-message user-message">
+    <strong>👤 Você:</strong><br>$content
+</div>
+""")
+
+_AGENT_MSG_TMPL = Template("""
+<div class="chat-message agent-message">
+    <strong>🤖 Agente:</strong> $success_badge $badge<br>$content
+</div>
+""")
+
+_SUCCESS_BADGE = '<span class="success-badge">✓ Sucesso</span>'
+_ERROR_BADGE = '<span class="error-message">✗ Erro</span>'
+
+# Badges por categoria pré-computados (antes: dict realocado por mensagem)
+_CATEGORY_BADGES = {
+    "CALCULATOR": '<span class="tool-badge" style="background: #4CAF50;">🧮 CALCULATOR</span>',
+    "RAG": '<span class="tool-badge" style="background: #2196F3;">📚 RAG</span>',
+    "WEB_SEARCH": '<span class="tool-badge" style="background: #FF9800;">🌐 WEB SEARCH</span>',
+    "DATETIME": '<span class="tool-badge" style="background: #9C27B0;">🕐 DATETIME</span>',
+    "DIRECT": '<span class="tool-badge" style="background: #607D8B;">💭 DIRECT</span>'
+}
+
+
+def render_message_html(msg: dict) -> str:
+    """Renderiza (uma única vez) o HTML de uma mensagem do chat"""
+    if msg["role"] == "user":
+        return _USER_MSG_TMPL.substitute(content=msg["content"])
+
+    success_badge = _SUCCESS_BADGE if msg.get("success", True) else _ERROR_BADGE
+    badge = _CATEGORY_BADGES.get(msg.get("category", "UNKNOWN"), '')
+    return _AGENT_MSG_TMPL.substitute(
+        success_badge=success_badge,
+        badge=badge,
+        content=msg["content"]
+    )
+
+# CSS customizado. A leitura é cacheada: o Streamlit reexecuta o script a
+# cada interação, e sem cache isso custaria um stat() + read() por rerun.
+@st.cache_data
+def _read_css(file_path: str) -> str:
     if os.path.exists(file_path):
         with open(file_path) as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+            return f.read()
+    return ""
+
+def load_css(file_path):
+    css = _read_css(file_path)
+    if css:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+
+# Info do provider muda só quando settings/env mudam: TTL curto evita
+# reconstruir o dict a cada rerun da sidebar
+@st.cache_data(ttl=60)
+def _provider_info() -> dict:
+    return llm_factory.get_provider_info()
+
+# Cache de respostas por (thread_id, query normalizada): perguntas
+# repetidas — comuns em demos — respondem em sub-ms sem tocar o grafo nem
+# gastar tokens. O thread_id na chave evita servir a um usuário respostas
+# dependentes do contexto da conversa de outro; respostas DATETIME nunca
+# entram (a hora muda a cada pergunta). Complementa o SQLiteCache de LLM,
+# que só acerta em prompts byte a byte idênticos.
+_RESPONSE_CACHE_TTL = 3600
+_RESPONSE_CACHE_MAX = 256
+_NORMALIZE_RE = re.compile(r"[^\w\s]")
+
+def _normalize_query(query: str) -> str:
+    return " ".join(_NORMALIZE_RE.sub("", query.lower()).split())
+
+@st.cache_resource
+def _response_cache() -> "OrderedDict":
+    # LRU compartilhado processo-wide: (thread_id, query) → (resposta,
+    # categoria, ts). Evicção por tamanho + purga de expirados no write:
+    # como o thread_id é um uuid4 por sessão, entradas de sessões mortas
+    # nunca mais acertam — sem limite, cresceriam para sempre
+    return OrderedDict()
+
+def _response_cache_put(cache: "OrderedDict", key, response_text: str, category: str):
+    """Insere no LRU, purgando expirados e limitando o tamanho"""
+    now = time.time()
+    for stale in [k for k, v in cache.items() if now - v[2] >= _RESPONSE_CACHE_TTL]:
+        del cache[stale]
+    cache[key] = (response_text, category, now)
+    cache.move_to_end(key)
+    while len(cache) > _RESPONSE_CACHE_MAX:
+        cache.popitem(last=False)
 
 load_css("assets/style.css")
 
@@ -30,8 +137,11 @@ if "agent" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# uuid4 por sessão: ids estáveis e sem risco de colisão (o timestamp de
+# resolução 1 s reutilizava o mesmo thread_id em limpezas rápidas,
+# vazando checkpoints antigos do LangGraph para a conversa "nova")
 if "thread_id" not in st.session_state:
-    st.session_state.thread_id = "streamlit-session"
+    st.session_state.thread_id = f"streamlit-{uuid.uuid4().hex[:12]}"
 
 # Sidebar
 with st.sidebar:
@@ -60,11 +170,7 @@ with st.sidebar:
 
     if st.session_state.agent is None or config_changed:
         with st.spinner("Atualizando Agente..."):
-            st.session_state.agent = SuperAgent(
-                provider=selected_provider, 
-                model=selected_model, 
-                temperature=selected_temp
-            )
+            st.session_state.agent = get_agent(selected_provider, selected_model, selected_temp)
             st.session_state.current_provider = selected_provider
             st.session_state.current_model = selected_model
             st.session_state.current_temp = selected_temp
@@ -72,7 +178,7 @@ with st.sidebar:
 
     st.markdown("### 📊 Informações do Sistema")
     if st.session_state.agent:
-        info = llm_factory.get_provider_info()
+        info = _provider_info()
         st.info(f"**Max Tokens:** {info['max_tokens']}")
         st.success("O agente usa um Router inteligente!")
     
@@ -85,86 +191,90 @@ with st.sidebar:
     
     if st.button("🗑️ Limpar Conversa", use_container_width=True):
         st.session_state.messages = []
-        st.session_state.thread_id = f"streamlit-session-{int(time.time())}"
+        st.session_state.thread_id = f"streamlit-{uuid.uuid4().hex[:12]}"
         st.rerun()
 
 # --- ÁREA DE CHAT ---
 st.markdown("### 💬 Conversa")
 
-# Container para mensagens (Isso permite que o chat role enquanto o input fica fixo)
-chat_placeholder = st.container()
-
-with chat_placeholder:
+# Fragment: um turno de chat reexecuta só esta região, em vez do script
+# inteiro (sidebar, CSS, exemplos). Dispensa os st.rerun() de página cheia
+# que eram necessários para ecoar a mensagem do usuário.
+@st.fragment
+def chat_fragment():
+    # Histórico inteiro em um único st.markdown: N mensagens viravam N
+    # elementos (N roundtrips de protobuf até o navegador) por rerun —
+    # agora é um só, independente do tamanho da conversa
+    html_parts = []
     for msg in st.session_state.messages:
-        if msg["role"] == "user":
-            st.markdown(f"""
-            <div class="chat-message user-message">
-                <strong>👤 Você:</strong><br>{msg["content"]}
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            success_badge = '<span class="success-badge">✓ Sucesso</span>' if msg.get("success", True) else '<span class="error-message">✗ Erro</span>'
-            category = msg.get("category", "UNKNOWN")
-            category_badges = {
-                "CALCULATOR": '<span class="tool-badge" style="background: #4CAF50;">🧮 CALCULATOR</span>',
-                "RAG": '<span class="tool-badge" style="background: #2196F3;">📚 RAG</span>',
-                "WEB_SEARCH": '<span class="tool-badge" style="background: #FF9800;">🌐 WEB SEARCH</span>',
-                "DATETIME": '<span class="tool-badge" style="background: #9C27B0;">🕐 DATETIME</span>',
-                "DIRECT": '<span class="tool-badge" style="background: #607D8B;">💭 DIRECT</span>'
-            }
-            badge = category_badges.get(category, '')
-            st.markdown(f"""
-            <div class="chat-message agent-message">
-                <strong>🤖 Agente:</strong> {success_badge} {badge}<br>{msg["content"]}
-            </div>
-            """, unsafe_allow_html=True)
-
-# --- INPUT FIXO NO RODAPÉ ---
-# O st.chat_input fica automaticamente fixo na base da página
-user_input = st.chat_input("Digite sua mensagem aqui...")
-
-if user_input:
-    # 1. Adiciona a mensagem do usuário ao estado
-    st.session_state.messages.append({"role": "user", "content": user_input})
-    
-    # 2. Rerenderiza para mostrar a pergunta do usuário antes de processar
-    st.rerun()
+        # HTML cacheado por mensagem: só a recém-adicionada paga a formatação
+        if "_html" not in msg:
+            msg["_html"] = render_message_html(msg)
+        html_parts.append(msg["_html"])
+    if html_parts:
+        st.markdown("".join(html_parts), unsafe_allow_html=True)
 
-# Lógica de processamento (Executa após o rerun se a última mensagem for do usuário)
-if st.session_state.messages and st.session_state.messages[-1]["role"] == "user":
-    last_user_msg = st.session_state.messages[-1]["content"]
-    
-    with st.chat_message("assistant", avatar="🤖"):
-        with st.spinner("🤔 Analisando..."):
+    user_input = st.chat_input("Digite sua mensagem aqui...")
+
+    if user_input:
+        # Ecoa a pergunta imediatamente, sem rerun de página
+        user_msg = {"role": "user", "content": user_input}
+        user_msg["_html"] = render_message_html(user_msg)
+        st.session_state.messages.append(user_msg)
+        st.markdown(user_msg["_html"], unsafe_allow_html=True)
+
+        with st.chat_message("assistant", avatar="🤖"):
             try:
-                result = st.session_state.agent.process_message(
-                    last_user_msg,
-                    thread_id=st.session_state.thread_id,
-                    debug=True
-                )
-                
+                cache = _response_cache()
+                cache_key = (st.session_state.thread_id, _normalize_query(user_input))
+                hit = cache.get(cache_key)
+                if hit is not None and time.time() - hit[2] >= _RESPONSE_CACHE_TTL:
+                    del cache[cache_key]
+                    hit = None
+
+                if hit is not None:
+                    # Pergunta já respondida (modulo caixa/pontuação):
+                    # resposta instantânea, custo zero de tokens
+                    cache.move_to_end(cache_key)
+                    response_text, category = hit[0], hit[1]
+                    st.markdown(response_text)
+                else:
+                    # Streaming: primeiro token em ~200 ms em vez de esperar
+                    # a resposta completa atrás de um spinner
+                    response_text = st.write_stream(
+                        st.session_state.agent.stream_message(
+                            user_input,
+                            thread_id=st.session_state.thread_id
+                        )
+                    )
+                    category = st.session_state.agent.get_last_category(st.session_state.thread_id)
+                    if response_text and category != "DATETIME":
+                        _response_cache_put(cache, cache_key, response_text, category)
+
                 # Salva a resposta
                 st.session_state.messages.append({
                     "role": "assistant",
-                    "content": result["response"],
-                    "success": result["success"],
-                    "category": result.get("category", "UNKNOWN")
+                    "content": response_text,
+                    "success": bool(response_text),
+                    "category": category
                 })
-                st.rerun()
-                
+
             except Exception as e:
                 st.error(f"Erro: {str(e)}")
 
-# Exemplos de uso (Só aparecem se o chat estiver vazio)
+chat_fragment()
+
+# Exemplos de uso (Só aparecem se o chat estiver vazio). Um único
+# st.markdown em vez de st.columns(4) + 4 writes: cada elemento Streamlit
+# é uma mensagem separada para o navegador — aqui o primeiro paint da
+# landing page cai de 5 elementos para 1.
+_EXAMPLES_HTML = """---
+<div style="display: flex; gap: 1rem;">
+    <div style="flex: 1;"><strong>🧮 Calculadora</strong><br>• Quanto é 128 x 46?</div>
+    <div style="flex: 1;"><strong>📚 Rag</strong><br>• Nycolas tem experiencias em projetos internacionais?</div>
+    <div style="flex: 1;"><strong>🌐 Web</strong><br>• Notícias sobre IA hoje</div>
+    <div style="flex: 1;"><strong>🕐 Tempo</strong><br>• Que horas são?</div>
+</div>"""
+
 if len(st.session_state.messages) == 0:
-    st.markdown("---")
-    cols = st.columns(4)
-    examples = [
-        ("🧮 Calculadora", "Quanto é 128 x 46?"),
-        ("📚 Rag", "Nycolas tem experiencias em projetos internacionais?"),
-        ("🌐 Web", "Notícias sobre IA hoje"),
-        ("🕐 Tempo", "Que horas são?")
-    ]
-    for col, (title, text) in zip(cols, examples):
-        with col:
-            st.markdown(f"**{title}**\n- {text}")
\ No newline at end of file
+    st.markdown(_EXAMPLES_HTML, unsafe_allow_html=True)
\ No newline at end of file
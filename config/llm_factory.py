@@ -1,35 +1,108 @@
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
+import atexit
+import functools
+import httpx
 from langchain_core.language_models.chat_models import BaseChatModel
 from config.settings import settings
 
+# HTTP/2 exige o pacote opcional h2; sem ele, seguimos com HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Cliente HTTP assíncrono compartilhado entre todas as instâncias de LLM:
+# o pool de conexões amortiza handshakes TCP+TLS (~100 ms por conexão fria)
+# entre requisições concorrentes, e HTTP/2 multiplexa várias chamadas na
+# mesma conexão com o provider.
+_SHARED_ASYNC_CLIENT = httpx.AsyncClient(
+    http2=_HTTP2,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+)
+
+# Contraparte síncrona do pool, para chamadas via invoke()/stream() — sem
+# ela, cada instância de LLM criaria seu próprio httpx.Client (pool e TLS
+# novos) para o caminho síncrono
+_SHARED_SYNC_CLIENT = httpx.Client(
+    http2=_HTTP2,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    timeout=60
+)
+
+
+def _close_shared_client():
+    import asyncio
+    try:
+        asyncio.run(_SHARED_ASYNC_CLIENT.aclose())
+    except Exception:
+        pass
+    try:
+        _SHARED_SYNC_CLIENT.close()
+    except Exception:
+        pass
+
+
+atexit.register(_close_shared_client)
+
+# Pré-carrega o encoder do tiktoken no import: ChatOpenAI o carregaria lazy
+# na primeira .invoke(), somando ~100 ms ao primeiro turno do usuário — aqui
+# o custo fica no startup, já coberto pelo spinner da UI. Só quando OpenAI é
+# o provider ativo (Groq/llama não usa tiktoken; nada a pré-carregar).
+if settings.LLM_PROVIDER == "openai":
+    try:
+        import tiktoken
+        tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+    except Exception:
+        pass
+
+# Memoização das instâncias de LLM: construir ChatOpenAI/ChatGroq monta
+# cliente HTTP, contexto TLS e config de tokenizer — caro para repetir a
+# cada chamador. Instâncias são compartilhadas (não mutar após criadas).
+# Os imports dos providers são lazy: cada um puxa tiktoken/pydantic/SDK
+# próprios (centenas de ms) — só o provider realmente usado é importado.
+@functools.lru_cache(maxsize=8)
+def _build_llm(provider: str, model: str, temperature: float, max_tokens: int) -> BaseChatModel:
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model,
+            api_key=settings.OPENAI_API_KEY,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            streaming=True,  # Permite streaming token a token nas UIs
+            http_client=_SHARED_SYNC_CLIENT,
+            http_async_client=_SHARED_ASYNC_CLIENT
+        )
+
+    elif provider == "groq":
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(
+            model=model,
+            api_key=settings.GROQ_API_KEY,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            streaming=True,  # Permite streaming token a token nas UIs
+            http_client=_SHARED_SYNC_CLIENT,
+            http_async_client=_SHARED_ASYNC_CLIENT
+        )
+
+    else:
+        raise ValueError(f"Provider '{provider}' não suportado. Use 'openai' ou 'groq'")
+
+
 class LLMFactory:
     @staticmethod
     def create_llm(provider: str = None, model: str = None, temperature: float = None) -> BaseChatModel:
         provider = provider or settings.LLM_PROVIDER
         temperature = temperature if temperature is not None else settings.TEMPERATURE
-        
-        if provider == "openai":
-            # Se não passar modelo, usa o default do settings
-            target_model = model or settings.OPENAI_MODEL
-            return ChatOpenAI(
-                model=target_model,
-                api_key=settings.OPENAI_API_KEY,
-                temperature=temperature,
-                max_tokens=settings.MAX_TOKENS
-            )
-        
-        elif provider == "groq":
-            target_model = model or settings.GROQ_MODEL
-            return ChatGroq(
-                model=target_model,
-                api_key=settings.GROQ_API_KEY,
-                temperature=temperature,
-                max_tokens=settings.MAX_TOKENS
-            )
-        
-        else:
-            raise ValueError(f"Provider '{provider}' não suportado. Use 'openai' ou 'groq'")
+
+        # Se não passar modelo, usa o default do settings
+        if model is None:
+            model = settings.OPENAI_MODEL if provider == "openai" else settings.GROQ_MODEL
+
+        return _build_llm(provider, model, temperature, settings.MAX_TOKENS)
     
     @staticmethod
     def get_provider_info() -> dict:
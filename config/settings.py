@@ -1,53 +1,73 @@
 import os
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 from typing import Literal
 
 load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """Configurações centralizadas da aplicação"""
-    
+    """
+    Configurações centralizadas da aplicação
+
+    Instância única, imutável (frozen) e sem __dict__ (slots): leituras de
+    atributo ficam mais baratas no caminho quente e a validação roda uma
+    única vez no import — erros de configuração aparecem antes de qualquer
+    inicialização cara de agente.
+    """
+
     # LLM Provider
-    LLM_PROVIDER: Literal["openai", "groq"] = os.getenv("LLM_PROVIDER", "groq")
-    
+    LLM_PROVIDER: Literal["openai", "groq"] = field(default_factory=lambda: os.getenv("LLM_PROVIDER", "groq"))
+
     # OpenAI
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
-    
+    OPENAI_API_KEY: str = field(default_factory=lambda: os.getenv("OPENAI_API_KEY", ""))
+    OPENAI_MODEL: str = field(default_factory=lambda: os.getenv("OPENAI_MODEL", "gpt-4.1-mini"))
+
     # Groq
-    GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
-    GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
-    
+    GROQ_API_KEY: str = field(default_factory=lambda: os.getenv("GROQ_API_KEY", ""))
+    GROQ_MODEL: str = field(default_factory=lambda: os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"))
+
     # Embeddings
-    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-    
+    EMBEDDING_MODEL: str = field(default_factory=lambda: os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"))
+
     # Vector Store
-    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "500"))
-    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "50"))
-    VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./vector_store")
-    
+    CHUNK_SIZE: int = field(default_factory=lambda: int(os.getenv("CHUNK_SIZE", "500")))
+    CHUNK_OVERLAP: int = field(default_factory=lambda: int(os.getenv("CHUNK_OVERLAP", "50")))
+    VECTOR_STORE_PATH: str = field(default_factory=lambda: os.getenv("VECTOR_STORE_PATH", "./vector_store"))
+    # Splitter de passada única (FastSplitter) no lugar do
+    # RecursiveCharacterTextSplitter: ~2x mais rápido em corpora grandes,
+    # com limite de tamanho de chunk estrito
+    FAST_SPLIT: bool = field(default_factory=lambda: os.getenv("FAST_SPLIT", "false").lower() == "true")
+    # Número de listas invertidas visitadas por consulta em índices IVF
+    # (recall x latência; só tem efeito em corpora grandes, com IVF+PQ)
+    FAISS_NPROBE: int = field(default_factory=lambda: int(os.getenv("FAISS_NPROBE", "16")))
+
     # Model Parameters
-    MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "4096"))
-    TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.7"))
-    
+    MAX_TOKENS: int = field(default_factory=lambda: int(os.getenv("MAX_TOKENS", "4096")))
+    TEMPERATURE: float = field(default_factory=lambda: float(os.getenv("TEMPERATURE", "0.7")))
+
+    # Execução especulativa: inicia o agente DIRECT em paralelo com o Router
+    # (custo: uma chamada LLM desperdiçada quando a rota não é DIRECT)
+    SPECULATIVE_ROUTE: bool = field(default_factory=lambda: os.getenv("SPECULATIVE_ROUTE", "false").lower() == "true")
+
     # Paths
     DOCS_PATH: str = "./docs"
     PROMPTS_PATH: str = "./prompts"
-    
-    @classmethod
-    def validate(cls):
+
+    def validate(self):
         """Valida as configurações necessárias"""
         errors = []
-        
-        if cls.LLM_PROVIDER == "openai" and not cls.OPENAI_API_KEY:
+
+        if self.LLM_PROVIDER == "openai" and not self.OPENAI_API_KEY:
             errors.append("OPENAI_API_KEY não configurada para provider OpenAI")
-        
-        if cls.LLM_PROVIDER == "groq" and not cls.GROQ_API_KEY:
+
+        if self.LLM_PROVIDER == "groq" and not self.GROQ_API_KEY:
             errors.append("GROQ_API_KEY não configurada para provider Groq")
-        
+
         if errors:
             raise ValueError("\n".join(errors))
-        
+
         return True
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
+settings.validate()
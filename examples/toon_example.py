@@ -8,14 +8,38 @@ Este exemplo mostra como:
 """
 
 from utils.toon_converter import TOONConverter, TOONPromptBuilder
+from functools import partial
+import io
 import json
+import sys
+
+# Saída bufferizada: cada print() é um write() síncrono no stdout — dezenas
+# por exemplo. Acumulamos tudo em um StringIO e fazemos um único flush por
+# exemplo (10-50x menos syscalls).
+
+# orjson serializa 3-10x mais rápido que a stdlib e já emite UTF-8 (mesmo
+# efeito do ensure_ascii=False); opcional, com fallback transparente
+try:
+    import orjson
+
+    def _dumps(data) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    _dumps = partial(json.dumps, indent=2, ensure_ascii=False)
+
+
+def _flush(buf: io.StringIO):
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
 
 def example_1_basic_conversion():
     """Exemplo 1: Conversão básica JSON → TOON"""
-    print("\n" + "="*60)
-    print("EXEMPLO 1: Conversão Básica JSON → TOON")
-    print("="*60 + "\n")
-    
+    buf = io.StringIO()
+    out = buf.write
+    out("\n" + "="*60 + "\n")
+    out("EXEMPLO 1: Conversão Básica JSON → TOON\n")
+    out("="*60 + "\n\n")
+
     # Dados em JSON (como trabalhamos programaticamente)
     user_data = {
         "name": "João Silva",
@@ -26,24 +50,27 @@ def example_1_basic_conversion():
             "platform": "web"
         }
     }
-    
-    print("📦 Dados originais (JSON):")
-    print(json.dumps(user_data, indent=2, ensure_ascii=False))
-    
+
+    out("📦 Dados originais (JSON):\n")
+    out(_dumps(user_data) + "\n")
+
     # Converte para TOON antes de enviar para LLM
     toon_format = TOONConverter.json_to_toon(user_data)
-    
-    print("\n📤 Formato TOON (enviado para LLM):")
-    print(toon_format)
-    
-    print("\n✅ Vantagem: LLMs processam TOON melhor que JSON puro")
+
+    out("\n📤 Formato TOON (enviado para LLM):\n")
+    out(toon_format + "\n")
+
+    out("\n✅ Vantagem: LLMs processam TOON melhor que JSON puro\n")
+    _flush(buf)
 
 def example_2_structured_output():
     """Exemplo 2: Saída estruturada com schema"""
-    print("\n" + "="*60)
-    print("EXEMPLO 2: Saída Estruturada com Schema")
-    print("="*60 + "\n")
-    
+    buf = io.StringIO()
+    out = buf.write
+    out("\n" + "="*60 + "\n")
+    out("EXEMPLO 2: Saída Estruturada com Schema\n")
+    out("="*60 + "\n\n")
+
     # Definimos o schema da resposta esperada (em JSON)
     output_schema = {
         "category": "string (CALCULATOR|RAG|DATETIME|DIRECT)",
@@ -51,46 +78,49 @@ def example_2_structured_output():
         "reasoning": "string",
         "suggested_tools": "array of strings"
     }
-    
+
     # Input data
     input_data = {
         "user_query": "Me fale sobre Large Language Models",
         "context": "technical_documentation"
     }
-    
+
     # Constrói prompt estruturado em TOON
     structured_prompt = TOONPromptBuilder.build_structured_prompt(
         task="Classify the user query and suggest appropriate tools",
         input_data=input_data,
         output_schema=output_schema
     )
-    
-    print("📤 Prompt enviado para LLM (TOON):")
-    print(structured_prompt)
-    
-    print("\n💡 O LLM receberá um prompt claramente estruturado")
-    print("💡 E responderá em JSON matching o schema")
+
+    out("📤 Prompt enviado para LLM (TOON):\n")
+    out(structured_prompt + "\n")
+
+    out("\n💡 O LLM receberá um prompt claramente estruturado\n")
+    out("💡 E responderá em JSON matching o schema\n")
+    _flush(buf)
 
 def example_3_tool_call_workflow():
     """Exemplo 3: Workflow completo de chamada de ferramenta"""
-    print("\n" + "="*60)
-    print("EXEMPLO 3: Workflow Completo de Tool Call")
-    print("="*60 + "\n")
-    
+    buf = io.StringIO()
+    out = buf.write
+    out("\n" + "="*60 + "\n")
+    out("EXEMPLO 3: Workflow Completo de Tool Call\n")
+    out("="*60 + "\n\n")
+
     # Passo 1: Router classifica (trabalha em JSON)
     router_input = {
         "query": "Calcule a raiz quadrada de 144",
         "user_id": "user_123"
     }
-    
-    print("1️⃣ Router recebe input (JSON):")
-    print(json.dumps(router_input, indent=2, ensure_ascii=False))
-    
+
+    out("1️⃣ Router recebe input (JSON):\n")
+    out(_dumps(router_input) + "\n")
+
     # Passo 2: Converte para TOON e envia para LLM
     toon_input = TOONConverter.json_to_toon(router_input)
-    print("\n2️⃣ Convertido para TOON:")
-    print(toon_input)
-    
+    out("\n2️⃣ Convertido para TOON:\n")
+    out(toon_input + "\n")
+
     # Passo 3: LLM responde (simulado)
     llm_response_json = {
         "category": "CALCULATOR",
@@ -102,34 +132,37 @@ def example_3_tool_call_workflow():
             }
         }
     }
-    
-    print("\n3️⃣ LLM responde em JSON:")
-    print(json.dumps(llm_response_json, indent=2, ensure_ascii=False))
-    
+
+    out("\n3️⃣ LLM responde em JSON:\n")
+    out(_dumps(llm_response_json) + "\n")
+
     # Passo 4: Preparamos a tool call em TOON
     tool_call_toon = TOONConverter.tool_call_to_toon(
         llm_response_json["tool_call"]["name"],
         llm_response_json["tool_call"]["arguments"]
     )
-    
-    print("\n4️⃣ Tool call formatado em TOON:")
-    print(tool_call_toon)
-    
+
+    out("\n4️⃣ Tool call formatado em TOON:\n")
+    out(tool_call_toon + "\n")
+
     # Passo 5: Executamos a tool e trabalhamos em JSON
     tool_result = {"result": 12.0, "status": "success"}
-    
-    print("\n5️⃣ Tool retorna resultado (JSON):")
-    print(json.dumps(tool_result, indent=2, ensure_ascii=False))
-    
-    print("\n✅ Todo o workflow mantém dados em JSON")
-    print("✅ TOON é usado apenas na comunicação com LLM")
+
+    out("\n5️⃣ Tool retorna resultado (JSON):\n")
+    out(_dumps(tool_result) + "\n")
+
+    out("\n✅ Todo o workflow mantém dados em JSON\n")
+    out("✅ TOON é usado apenas na comunicação com LLM\n")
+    _flush(buf)
 
 def example_4_real_world_scenario():
     """Exemplo 4: Cenário real com Router Agent"""
-    print("\n" + "="*60)
-    print("EXEMPLO 4: Cenário Real - Router Agent")
-    print("="*60 + "\n")
-    
+    buf = io.StringIO()
+    out = buf.write
+    out("\n" + "="*60 + "\n")
+    out("EXEMPLO 4: Cenário Real - Router Agent\n")
+    out("="*60 + "\n\n")
+
     # Aplicação trabalha em JSON
     application_state = {
         "user_query": "Qual é a diferença entre 2024-12-31 e 2024-01-01?",
@@ -142,10 +175,10 @@ def example_4_real_world_scenario():
             "timezone": "America/Sao_Paulo"
         }
     }
-    
-    print("📱 Estado da aplicação (JSON):")
-    print(json.dumps(application_state, indent=2, ensure_ascii=False))
-    
+
+    out("📱 Estado da aplicação (JSON):\n")
+    out(_dumps(application_state) + "\n")
+
     # Preparamos para enviar ao Router
     router_prompt_data = {
         "query": application_state["user_query"],
@@ -154,14 +187,14 @@ def example_4_real_world_scenario():
             "language": application_state["user_preferences"]["language"]
         }
     }
-    
+
     # Schema esperado da resposta
     response_schema = {
         "category": "string",
         "confidence": "float",
         "reasoning": "string"
     }
-    
+
     # Constrói prompt TOON
     toon_prompt = TOONPromptBuilder.build_structured_prompt(
         task="Classify this query into the most appropriate category",
@@ -178,34 +211,35 @@ def example_4_real_world_scenario():
             }
         ]
     )
-    
-    print("\n📤 Prompt enviado ao LLM (TOON):")
-    print(toon_prompt[:500] + "...")
-    
+
+    out("\n📤 Prompt enviado ao LLM (TOON):\n")
+    out(toon_prompt[:500] + "...\n")
+
     # LLM responde
     llm_response = {
         "category": "DATETIME",
         "confidence": 0.97,
         "reasoning": "User is asking to calculate difference between two dates"
     }
-    
-    print("\n📥 Resposta do LLM (JSON parseado):")
-    print(json.dumps(llm_response, indent=2, ensure_ascii=False))
-    
+
+    out("\n📥 Resposta do LLM (JSON parseado):\n")
+    out(_dumps(llm_response) + "\n")
+
     # Aplicação continua trabalhando em JSON
     application_state["routing_decision"] = llm_response
     application_state["next_agent"] = llm_response["category"].lower() + "_agent"
-    
-    print("\n📱 Estado atualizado da aplicação (JSON):")
-    print(json.dumps(application_state, indent=2, ensure_ascii=False))
-    
-    print("\n" + "="*60)
-    print("RESUMO DO WORKFLOW")
-    print("="*60)
-    print("✅ Aplicação trabalha 100% em JSON")
-    print("✅ TOON usado apenas para comunicação com LLM")
-    print("✅ Parsing de volta para JSON automático")
-    print("✅ Estrutura clara e type-safe")
+
+    out("\n📱 Estado atualizado da aplicação (JSON):\n")
+    out(_dumps(application_state) + "\n")
+
+    out("\n" + "="*60 + "\n")
+    out("RESUMO DO WORKFLOW\n")
+    out("="*60 + "\n")
+    out("✅ Aplicação trabalha 100% em JSON\n")
+    out("✅ TOON usado apenas para comunicação com LLM\n")
+    out("✅ Parsing de volta para JSON automático\n")
+    out("✅ Estrutura clara e type-safe\n")
+    _flush(buf)
 
 if __name__ == "__main__":
     # Executa todos os exemplos
@@ -213,11 +247,11 @@ if __name__ == "__main__":
     example_2_structured_output()
     example_3_tool_call_workflow()
     example_4_real_world_scenario()
-    
-    print("\n\n" + "="*60)
-    print("🎯 CONCLUSÃO")
-    print("="*60)
-    print("""
+
+    sys.stdout.write("\n\n" + "="*60 + "\n")
+    sys.stdout.write("🎯 CONCLUSÃO\n")
+    sys.stdout.write("="*60 + "\n")
+    sys.stdout.write("""
 O workflow JSON → TOON → JSON oferece:
 
 1. ✅ Trabalho programático em JSON (type-safe, fácil manipular)
@@ -227,4 +261,4 @@ O workflow JSON → TOON → JSON oferece:
 5. ✅ Melhor performance e accuracy do LLM
 
 Este é o padrão recomendado para aplicações profissionais!
-    """)
\ No newline at end of file
+    \n""")
@@ -1,33 +1,94 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response, stream_with_context
 from flask_cors import CORS
+import json
+
+# orjson (Rust) serializa 3-10x mais rápido que o encoder do jsonify e já
+# lida com datetime/UUID nativamente; opcional, com fallback transparente
+try:
+    import orjson
+    _dumps_bytes = orjson.dumps
+except ImportError:
+    orjson = None
+
+    def _dumps_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False).encode()
 from agents.super_agent import SuperAgent
 from config.settings import settings
+from collections import OrderedDict
+import os
+import threading
 import uuid
-from typing import Dict
 import traceback
 
 app = Flask(__name__)
 CORS(app)  # Habilita CORS para chamadas de frontend
 
-# Armazena instâncias de agentes por sessão
-agents: Dict[str, SuperAgent] = {}
+# Com orjson disponível, também o parse de request.get_json() usa o
+# decoder nativo — payloads de chat com contexto multi-KB deixam de
+# passar pelo json.loads do stdlib
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class ORJSONProvider(JSONProvider):
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+
+def jresp(obj, status: int = 200):
+    """Resposta JSON serializada via orjson (substitui jsonify nos endpoints)"""
+    return app.response_class(_dumps_bytes(obj), status=status, mimetype="application/json")
+
+
+# Armazena instâncias de agentes por sessão, com evicção LRU: o dict
+# original crescia sem limite (um SuperAgent por session_id, para sempre) —
+# o RSS do worker agora fica limitado às MAX_SESSIONS sessões mais recentes
+MAX_SESSIONS = int(os.getenv("MAX_AGENT_SESSIONS", "100"))
+# Cache de nomes de classe de mensagem usado na serialização do histórico
+_MSG_TYPE_NAMES = {}
+agents: "OrderedDict[str, SuperAgent]" = OrderedDict()
+_agents_lock = threading.Lock()
+
+# Provider default do processo, alterável via POST /api/provider. Settings
+# é frozen (imutável por design) — o estado mutável vive aqui, não lá.
+_default_provider = settings.LLM_PROVIDER
 
 def get_or_create_agent(session_id: str, provider: str = None) -> SuperAgent:
     """
-    Retorna ou cria uma instância do agente para a sessão
+    Retorna ou cria uma instância do agente para a sessão (LRU thread-safe)
     """
-    if session_id not in agents:
-        agents[session_id] = SuperAgent(provider=provider)
-    return agents[session_id]
+    provider = provider or _default_provider
+    with _agents_lock:
+        agent = agents.get(session_id)
+        if agent is not None:
+            agents.move_to_end(session_id)
+            return agent
+
+    # Construção cara (LLM, router, grafo) fica fora do lock
+    agent = SuperAgent(provider=provider)
+
+    with _agents_lock:
+        existing = agents.get(session_id)
+        if existing is not None:
+            # Outra thread criou primeiro: descarta a nossa cópia
+            agents.move_to_end(session_id)
+            return existing
+        agents[session_id] = agent
+        while len(agents) > MAX_SESSIONS:
+            agents.popitem(last=False)
+    return agent
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint de health check"""
-    return jsonify({
+    return jresp({
         "status": "healthy",
-        "provider": settings.LLM_PROVIDER,
+        "provider": _default_provider,
         "version": "1.0.0"
-    }), 200
+    }, 200)
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -54,18 +115,18 @@ def chat():
         data = request.get_json()
         
         if not data:
-            return jsonify({
+            return jresp({
                 "success": False,
                 "error": "Body JSON não fornecido"
-            }), 400
+            }, 400)
         
         message = data.get("message")
         
         if not message:
-            return jsonify({
+            return jresp({
                 "success": False,
                 "error": "Campo 'message' é obrigatório"
-            }), 400
+            }, 400)
         
         # Session ID
         session_id = data.get("session_id")
@@ -95,17 +156,53 @@ def chat():
         if not result["success"]:
             response_data["error"] = result.get("error", "unknown_error")
         
-        return jsonify(response_data), 200
+        return jresp(response_data, 200)
         
     except Exception as e:
         print(f"[API] Erro no endpoint /chat: {str(e)}")
         traceback.print_exc()
         
-        return jsonify({
+        return jresp({
             "success": False,
             "error": f"Erro interno do servidor: {str(e)}",
             "type": type(e).__name__
-        }), 500
+        }, 500)
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Chat com resposta em streaming via Server-Sent Events
+
+    O primeiro token chega em ~100-200 ms em vez do blob JSON único após a
+    geração completa; o socket fica ocupado incrementalmente em vez de
+    prender o worker ocioso.
+
+    Body JSON: igual ao /api/chat.
+    Eventos: data: {"token": "..."} por chunk, e ao final
+             data: {"done": true, "session_id": "..."}
+    """
+    data = request.get_json()
+
+    if not data or not data.get("message"):
+        return jresp({
+            "success": False,
+            "error": "Campo 'message' é obrigatório"
+        }, 400)
+
+    message = data["message"]
+    session_id = data.get("session_id") or str(uuid.uuid4())
+    agent = get_or_create_agent(session_id, data.get("provider"))
+
+    def generate():
+        try:
+            for token in agent.stream_message(message, thread_id=session_id):
+                yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+            yield f"data: {json.dumps({'done': True, 'session_id': session_id})}\n\n"
+        except Exception as e:
+            print(f"[API] Erro no endpoint /chat/stream: {str(e)}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
 @app.route('/api/history/<session_id>', methods=['GET'])
 def get_history(session_id: str):
@@ -121,36 +218,38 @@ def get_history(session_id: str):
     """
     try:
         if session_id not in agents:
-            return jsonify({
+            return jresp({
                 "success": False,
                 "error": "Sessão não encontrada"
-            }), 404
+            }, 404)
         
         agent = agents[session_id]
         history = agent.get_conversation_history(thread_id=session_id)
-        
-        # Serializa mensagens
-        messages = []
-        for msg in history:
-            messages.append({
-                "type": msg.__class__.__name__,
-                "content": msg.content
-            })
-        
-        return jsonify({
+
+        # Serializa mensagens em uma comprehension única; o nome do tipo é
+        # memoizado por classe (histories longos repetem as mesmas 3-4
+        # classes de mensagem milhares de vezes)
+        type_names = _MSG_TYPE_NAMES
+        messages = [
+            {"type": type_names.get(type(msg)) or type_names.setdefault(type(msg), type(msg).__name__),
+             "content": msg.content}
+            for msg in history
+        ]
+
+        return jresp({
             "success": True,
             "session_id": session_id,
             "messages": messages,
             "count": len(messages)
-        }), 200
+        }, 200)
         
     except Exception as e:
         print(f"[API] Erro no endpoint /history: {str(e)}")
         
-        return jsonify({
+        return jresp({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 @app.route('/api/clear/<session_id>', methods=['POST'])
 def clear_conversation(session_id: str):
@@ -165,27 +264,27 @@ def clear_conversation(session_id: str):
     """
     try:
         if session_id not in agents:
-            return jsonify({
+            return jresp({
                 "success": False,
                 "error": "Sessão não encontrada"
-            }), 404
+            }, 404)
         
         agent = agents[session_id]
         agent.clear_conversation(thread_id=session_id)
         
-        return jsonify({
+        return jresp({
             "success": True,
             "message": "Conversa limpa com sucesso",
             "session_id": session_id
-        }), 200
+        }, 200)
         
     except Exception as e:
         print(f"[API] Erro no endpoint /clear: {str(e)}")
         
-        return jsonify({
+        return jresp({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 @app.route('/api/sessions', methods=['GET'])
 def list_sessions():
@@ -199,11 +298,11 @@ def list_sessions():
         "count": 2
     }
     """
-    return jsonify({
+    return jresp({
         "success": True,
         "sessions": list(agents.keys()),
         "count": len(agents)
-    }), 200
+    }, 200)
 
 @app.route('/api/provider', methods=['GET', 'POST'])
 def manage_provider():
@@ -219,42 +318,45 @@ def manage_provider():
     if request.method == 'GET':
         from config.llm_factory import llm_factory
         
-        return jsonify({
+        return jresp({
             "success": True,
             "provider_info": llm_factory.get_provider_info()
-        }), 200
+        }, 200)
     
     elif request.method == 'POST':
         data = request.get_json()
         new_provider = data.get("provider")
-        
+
         if new_provider not in ["openai", "groq"]:
-            return jsonify({
+            return jresp({
                 "success": False,
                 "error": "Provider deve ser 'openai' ou 'groq'"
-            }), 400
-        
-        settings.LLM_PROVIDER = new_provider
-        
-        return jsonify({
+            }, 400)
+
+        # Settings é frozen: o default mutável do processo fica no módulo.
+        # Vale para novas sessões; as existentes mantêm seu agente.
+        global _default_provider
+        _default_provider = new_provider
+
+        return jresp({
             "success": True,
             "message": f"Provider alterado para {new_provider}",
             "provider": new_provider
-        }), 200
+        }, 200)
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({
+    return jresp({
         "success": False,
         "error": "Endpoint não encontrado"
-    }), 404
+    }, 404)
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({
+    return jresp({
         "success": False,
         "error": "Erro interno do servidor"
-    }), 500
+    }, 500)
 
 if __name__ == '__main__':
     print("\n" + "="*50)
@@ -270,5 +372,15 @@ if __name__ == '__main__':
     print("  - GET  /api/sessions")
     print("  - GET/POST /api/provider")
     print("="*50 + "\n")
-    
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+
+    # threaded=True: requisições concorrentes de /api/chat deixam de
+    # serializar — cada uma bloqueia só a sua thread enquanto espera o LLM
+    # (I/O de rede libera o GIL). debug desligado por padrão: o reloader
+    # do modo debug duplica o processo e desativa o threading.
+    #
+    # Em produção, use workers com threads:
+    #   gunicorn -w 2 -k gthread --threads 16 -b 0.0.0.0:5000 flask_api:app
+    # (gevent/monkey-patching não se aplica aqui: o pipeline do agente usa
+    # asyncio internamente, que não convive com o patch do gevent)
+    debug = os.getenv("FLASK_DEBUG", "false").lower() == "true"
+    app.run(host='0.0.0.0', port=5000, debug=debug, threaded=True)
\ No newline at end of file
@@ -1,4 +1,8 @@
+import bisect
 import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import List
 from pathlib import Path
 from langchain_core.documents import Document
@@ -6,54 +10,146 @@ from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, Te
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings  
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from config.settings import settings
 
+# faiss nativo para montar índices ANN (HNSW/IVF-PQ); opcional — sem ele,
+# caímos no índice flat padrão do LangChain
+try:
+    import faiss
+    import numpy as np
+except ImportError:
+    faiss = None
+
+# Singleton de embeddings por processo: cada DocumentProcessor criava o
+# próprio OpenAIEmbeddings (releitura de env, novo cliente, recarga do
+# tokenizer tiktoken) — o modelo é o mesmo para todos os usos
+_EMB = None
+
+def get_embedding_function():
+    """Retorna instância única (por processo) do OpenAI embedding model"""
+    global _EMB
+    if _EMB is None:
+        print(f"[EMBEDDING] Inicializando OpenAI ({settings.EMBEDDING_MODEL})...")
+
+        # Reutiliza o pool de conexões httpx compartilhado com os LLMs:
+        # sem ele cada OpenAIEmbeddings cria o próprio cliente e paga
+        # handshake TLS (~100ms) a cada conexão nova sob concorrência
+        from config.llm_factory import _SHARED_SYNC_CLIENT, _SHARED_ASYNC_CLIENT
+
+        # OpenAI exige uma API Key. Certifique-se que OPENAI_API_KEY
+        # esteja no seu arquivo .env ou variáveis de ambiente.
+        _EMB = OpenAIEmbeddings(
+            model=settings.EMBEDDING_MODEL, # Ex: "text-embedding-3-small"
+            http_client=_SHARED_SYNC_CLIENT,
+            http_async_client=_SHARED_ASYNC_CLIENT
+        )
+        print("[EMBEDDING] ✓ OpenAI Embeddings carregado")
+    return _EMB
+
+
+def _load_document_file(file_path: str) -> List[Document]:
+    """
+    Carrega um documento baseado na extensão (função de módulo: picklável
+    para uso em ProcessPoolExecutor)
+    """
+    file_ext = Path(file_path).suffix.lower()
+
+    try:
+        if file_ext == ".pdf":
+            loader = PyPDFLoader(file_path)
+        elif file_ext == ".docx":
+            loader = Docx2txtLoader(file_path)
+        elif file_ext == ".txt":
+            loader = TextLoader(file_path, encoding="utf-8")
+        else:
+            raise ValueError(f"Formato não suportado: {file_ext}")
+
+        documents = loader.load()
+        print(f"[LOADER] ✓ {len(documents)} páginas carregadas de {Path(file_path).name}")
+        return documents
+
+    except Exception as e:
+        print(f"[LOADER] ✗ Erro ao carregar {file_path}: {str(e)}")
+        return []
+
+
+# Separadores reconhecidos pelo FastSplitter, em uma única varredura
+_SEP_RE = re.compile(r"\n\n|\n| ")
+
+
+class FastSplitter:
+    """
+    Splitter de passada única com limite estrito de chunk_size
+
+    O RecursiveCharacterTextSplitter re-escaneia o texto por nível de
+    separador e pode exigir passadas extras quando um chunk sai grande
+    demais. Aqui os offsets de todos os separadores são coletados em uma
+    varredura e empacotados gulosamente em janelas de até chunk_size,
+    com overlap — ~2x mais rápido em corpora grandes e com tamanho de
+    chunk determinístico.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            for piece in self._split_text(doc.page_content):
+                chunks.append(Document(page_content=piece, metadata=dict(doc.metadata)))
+        return chunks
+
+    def _split_text(self, text: str):
+        if len(text) <= self.chunk_size:
+            if text.strip():
+                yield text
+            return
+
+        offsets = [m.start() for m in _SEP_RE.finditer(text)]
+        start = 0
+        while start < len(text):
+            limit = start + self.chunk_size
+            if limit >= len(text):
+                cut = len(text)
+            else:
+                # Maior separador dentro da janela; sem separador, corta
+                # duro em chunk_size (limite estrito)
+                j = bisect.bisect_right(offsets, limit) - 1
+                cut = offsets[j] if j >= 0 and offsets[j] > start else limit
+            piece = text[start:cut]
+            if piece.strip():
+                yield piece
+            if cut >= len(text):
+                return
+            start = max(cut - self.chunk_overlap, start + 1)
+
+
 class DocumentProcessor:
     """Processa documentos, faz chunking e indexa no vector store"""
-    
+
     def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
-        self.embedding_function = None
-        
-    def get_embedding_function(self):
-        """Retorna instância única do OpenAI embedding model"""
-        if self.embedding_function is None:
-            print(f"[EMBEDDING] Inicializando OpenAI ({settings.EMBEDDING_MODEL})...")
-            
-            # OpenAI exige uma API Key. Certifique-se que OPENAI_API_KEY 
-            # esteja no seu arquivo .env ou variáveis de ambiente.
-            self.embedding_function = OpenAIEmbeddings(
-                model=settings.EMBEDDING_MODEL # Ex: "text-embedding-3-small"
+        if settings.FAST_SPLIT:
+            self.text_splitter = FastSplitter(
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP
+            )
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP,
+                length_function=len,
+                separators=["\n\n", "\n", " ", ""]
             )
-            print("[EMBEDDING] ✓ OpenAI Embeddings carregado")
-        return self.embedding_function
+    def get_embedding_function(self):
+        """Delegado ao singleton de módulo (compartilhado entre instâncias)"""
+        return get_embedding_function()
     
     def load_document(self, file_path: str) -> List[Document]:
         """Carrega documento baseado na extensão"""
-        file_ext = Path(file_path).suffix.lower()
-        
-        try:
-            if file_ext == ".pdf":
-                loader = PyPDFLoader(file_path)
-            elif file_ext == ".docx":
-                loader = Docx2txtLoader(file_path)
-            elif file_ext == ".txt":
-                loader = TextLoader(file_path, encoding="utf-8")
-            else:
-                raise ValueError(f"Formato não suportado: {file_ext}")
-            
-            documents = loader.load()
-            print(f"[LOADER] ✓ {len(documents)} páginas carregadas de {Path(file_path).name}")
-            return documents
-            
-        except Exception as e:
-            print(f"[LOADER] ✗ Erro ao carregar {file_path}: {str(e)}")
-            return []
+        return _load_document_file(file_path)
     
     def load_all_documents(self, docs_path: str = None) -> List[Document]:
         """Carrega todos os documentos da pasta docs"""
@@ -68,11 +164,16 @@ class DocumentProcessor:
         files = [f for f in Path(docs_path).glob("*") if f.suffix.lower() in supported_extensions]
         
         print(f"[LOADER] Encontrados {len(files)} documentos em {docs_path}")
-        
-        for file_path in files:
-            docs = self.load_document(str(file_path))
-            all_documents.extend(docs)
-        
+
+        if len(files) == 1:
+            all_documents.extend(self.load_document(str(files[0])))
+        else:
+            # Parsing de PDF/docx é CPU-bound em Python puro e os arquivos
+            # são independentes: um processo por core escala quase linear
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                for docs in executor.map(_load_document_file, (str(f) for f in files)):
+                    all_documents.extend(docs)
+
         print(f"[LOADER] ✓ Total: {len(all_documents)} páginas carregadas")
         return all_documents
     
@@ -91,17 +192,101 @@ class DocumentProcessor:
         
         return chunks
     
+    # Tamanho das fatias enviadas à API de embeddings: lotes grandes
+    # amortizam o overhead HTTPS por requisição
+    EMBED_BATCH_SIZE = 512
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings em lotes explícitos e paralelos
+
+        O gargalo é I/O de rede com a OpenAI: fatias disjuntas de
+        EMBED_BATCH_SIZE textos são embutidas em paralelo via threads,
+        em vez de uma sequência de requisições pequenas.
+        """
+        embedding_function = self.get_embedding_function()
+
+        if len(texts) <= self.EMBED_BATCH_SIZE:
+            return embedding_function.embed_documents(texts)
+
+        slices = [
+            texts[i:i + self.EMBED_BATCH_SIZE]
+            for i in range(0, len(texts), self.EMBED_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            parts = list(executor.map(embedding_function.embed_documents, slices))
+
+        return [vector for part in parts for vector in part]
+
+    def _build_ann_index(self, emb_matrix: "np.ndarray"):
+        """
+        Monta um índice ANN adequado ao tamanho do corpus
+
+        O IndexFlatL2 default faz varredura linear O(N·d) por consulta.
+        HNSW32 responde em ~O(log N); o sufixo SQ8 quantiza os vetores
+        para int8 (4x menos banda de memória no scan, perda de recall
+        desprezível em embeddings de texto). Acima de ~1M de vetores,
+        IVF+PQ comprime ainda mais (códigos de 8 bits por sub-vetor).
+
+        Os vetores são normalizados in-place e a métrica é produto
+        interno: com vetores unitários o ranking é idêntico ao de
+        cosseno/L2, mas o kernel dispensa a subtração por lane (SIMD
+        mais eficiente).
+        """
+        n, d = emb_matrix.shape
+
+        if n < 1_000_000:
+            description = "HNSW32,SQ8"
+        else:
+            description = f"IVF{int(n ** 0.5)},PQ{max(1, d // 4)}"
+
+        faiss.normalize_L2(emb_matrix)
+        faiss.omp_set_num_threads(os.cpu_count() or 1)
+        index = faiss.index_factory(d, description, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            index.train(emb_matrix)
+        index.add(emb_matrix)
+        return index
+
     def create_vector_store(self, chunks: List[Document]) -> FAISS:
         """Cria vector store FAISS a partir dos chunks"""
         if not chunks:
             raise ValueError("Nenhum chunk fornecido para criar vector store")
-        
+
         embedding_function = self.get_embedding_function()
-        
+
         print(f"[VECTOR STORE] Criando índice FAISS com {len(chunks)} chunks...")
-        vector_store = FAISS.from_documents(chunks, embedding_function)
+
+        # Embeddings em lote explícito (em vez do batching default do
+        # from_documents) e índice montado a partir dos vetores prontos
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        embeddings = self.embed_texts(texts)
+
+        if faiss is not None:
+            index = self._build_ann_index(np.asarray(embeddings, dtype="float32"))
+            docstore = InMemoryDocstore({
+                str(i): Document(page_content=texts[i], metadata=metadatas[i])
+                for i in range(len(texts))
+            })
+            # normalize_L2=True: consultas também são normalizadas na
+            # busca, casando com o índice de produto interno
+            vector_store = FAISS(
+                embedding_function=embedding_function,
+                index=index,
+                docstore=docstore,
+                index_to_docstore_id={i: str(i) for i in range(len(texts))},
+                normalize_L2=True,
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+            )
+        else:
+            vector_store = FAISS.from_embeddings(
+                list(zip(texts, embeddings)),
+                embedding_function,
+                metadatas=metadatas
+            )
         print(f"[VECTOR STORE] ✓ Índice criado: {vector_store.index.ntotal} vetores")
-        
+
         return vector_store
     
     def save_vector_store(self, vector_store: FAISS, path: str = None):
@@ -113,22 +298,64 @@ class DocumentProcessor:
         print(f"[VECTOR STORE] ✓ Salvo em {path}")
     
     def load_vector_store(self, path: str = None) -> FAISS:
-        """Carrega vector store do disco"""
+        """
+        Carrega vector store do disco
+
+        Com faiss disponível, o arquivo do índice é aberto via mmap
+        read-only: N workers do gunicorn compartilham as mesmas páginas
+        físicas em vez de cada um desserializar sua cópia no heap
+        (combine com --preload para compartilhar também o docstore via
+        copy-on-write). Nem todo tipo de índice suporta mmap — nesses
+        casos, cai no load_local padrão.
+        """
         path = path or settings.VECTOR_STORE_PATH
-        
+
         if not os.path.exists(path):
             raise FileNotFoundError(f"Vector store não encontrado em {path}")
-        
+
         embedding_function = self.get_embedding_function()
-        
+
         print(f"[VECTOR STORE] Carregando de {path}...")
-        vector_store = FAISS.load_local(
-            path, 
-            embedding_function, 
-            allow_dangerous_deserialization=True
-        )
+        vector_store = None
+
+        if faiss is not None:
+            try:
+                raw_index = faiss.read_index(
+                    os.path.join(path, "index.faiss"),
+                    faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+                # O .pkl do save_local guarda (docstore, index_to_docstore_id)
+                with open(os.path.join(path, "index.pkl"), "rb") as f:
+                    docstore, index_to_docstore_id = pickle.load(f)
+                # A métrica vem do índice carregado: normalizar consultas e
+                # usar MAX_INNER_PRODUCT só faz sentido sobre os índices IP
+                # de vetores normalizados do _build_ann_index — num store
+                # L2 pré-existente isso inverteria a semântica dos scores
+                kwargs = {}
+                if raw_index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                    kwargs = {
+                        "normalize_L2": True,
+                        "distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT,
+                    }
+                vector_store = FAISS(
+                    embedding_function=embedding_function,
+                    index=raw_index,
+                    docstore=docstore,
+                    index_to_docstore_id=index_to_docstore_id,
+                    **kwargs
+                )
+                print("[VECTOR STORE] ✓ Índice mapeado via mmap")
+            except Exception as e:
+                print(f"[VECTOR STORE] mmap indisponível ({e}); usando load_local")
+
+        if vector_store is None:
+            vector_store = FAISS.load_local(
+                path,
+                embedding_function,
+                allow_dangerous_deserialization=True
+            )
         print(f"[VECTOR STORE] ✓ Carregado: {vector_store.index.ntotal} vetores")
-        
+
         return vector_store
     
     def process_and_index(self, docs_path: str = None, vector_store_path: str = None):
@@ -30,49 +30,58 @@ def _load_prompt(filename: str) -> str:
         print(f"[PROMPTS] ✗ Erro ao carregar {filename}: {str(e)}")
         raise
 
+# Arquivos de prompt conhecidos, carregados uma única vez no import do
+# módulo: os prompts entram em TODA requisição ao LLM, e reler/strip o
+# arquivo a cada chamada custava um stat + open + read por mensagem
+_PROMPT_FILES = {
+    "router": "router_prompt.txt",
+    "super_agent": "super_agent_prompt.txt",
+    "rag_agent": "rag_agent_prompt.txt",
+}
+
+_PROMPT_CACHE = {name: _load_prompt(fn) for name, fn in _PROMPT_FILES.items()}
+
 def get_router_prompt() -> str:
     """
     Retorna o prompt do sistema para o Router Agent
-    
+
     Returns:
         String com o prompt do router
     """
-    return _load_prompt("router_prompt.txt")
+    return _PROMPT_CACHE["router"]
 
 def get_super_agent_prompt() -> str:
     """
     Retorna o prompt do sistema para o Super Agent (executor)
-    
+
     Returns:
         String com o prompt do super agent
     """
-    return _load_prompt("super_agent_prompt.txt")
+    return _PROMPT_CACHE["super_agent"]
 
 def get_rag_agent_prompt() -> str:
     """
     Retorna o prompt específico para o agente RAG
-    
+
     Returns:
         String com o prompt do RAG agent
     """
-    return _load_prompt("rag_agent_prompt.txt")
+    return _PROMPT_CACHE["rag_agent"]
 
 
 def reload_prompts():
     """
-    Recarrega todos os prompts (útil para desenvolvimento)
+    Recarrega todos os prompts do disco (útil para desenvolvimento)
     """
     print("\n[PROMPTS] Recarregando todos os prompts...")
-    
-    prompts = {
-        "Router": get_router_prompt(),
-        "Super Agent": get_super_agent_prompt(),
-        "RAG Agent": get_rag_agent_prompt()
-    }
-    
-    print(f"[PROMPTS] ✓ {len(prompts)} prompts recarregados com sucesso\n")
-    
-    return prompts
+
+    _PROMPT_CACHE.update(
+        {name: _load_prompt(fn) for name, fn in _PROMPT_FILES.items()}
+    )
+
+    print(f"[PROMPTS] ✓ {len(_PROMPT_CACHE)} prompts recarregados com sucesso\n")
+
+    return dict(_PROMPT_CACHE)
 
 def validate_prompts():
     """
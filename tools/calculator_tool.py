@@ -1,68 +1,103 @@
 from langchain_core.tools import tool
-import re
-from typing import Union
+from functools import lru_cache
+import ast
+import math
+
+# Ambiente de avaliação: apenas funções matemáticas conhecidas, sem builtins
+_SAFE_ENV = {
+    "sqrt": math.sqrt,
+    "abs": abs,
+    "pow": pow,
+    "min": min,
+    "max": max,
+    "round": round,
+    "pi": math.pi,
+    "e": math.e,
+    "__builtins__": {}
+}
+
+# Nós de AST permitidos: expressões puramente numéricas e chamadas às
+# funções do _SAFE_ENV — qualquer outro nó (atributos, subscripts,
+# comprehensions, lambdas...) é rejeitado antes de compilar
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Call,
+    ast.Name, ast.Load, ast.Tuple,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Pow, ast.USub, ast.UAdd
+)
+
+# Locals compartilhado entre avaliações: expressões (mode="eval") nunca
+# atribuem nomes, então o dict permanece vazio e não precisa ser recriado
+_EMPTY_LOCALS = {}
+
+
+@lru_cache(maxsize=4096)
+def _compile_expression(expression: str):
+    """
+    Valida via AST e compila a expressão (memoizado por string)
+
+    Parsear + compilar é o custo dominante de cada chamada; expressões
+    repetidas (retries do LLM, queries populares) reusam o code object.
+    A validação estrutural também fecha as brechas do sandbox por
+    blacklist de caracteres (ex.: nomes arbitrários via chamadas).
+    """
+    tree = ast.parse(expression, mode="eval")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"elemento não permitido: {type(node).__name__}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _SAFE_ENV:
+                raise ValueError("apenas funções matemáticas conhecidas são permitidas")
+        elif isinstance(node, ast.Name) and node.id not in _SAFE_ENV:
+            raise ValueError(f"nome não reconhecido: {node.id}")
+
+    return compile(tree, "<calc>", "eval")
+
 
 @tool
 def calculator(expression: str) -> str:
     """
     Calculadora para operações matemáticas básicas e avançadas.
-    
+
     Suporta: +, -, *, /, **, (), funções matemáticas básicas.
-    
+
     Args:
         expression: Expressão matemática como string (ex: "2 + 2", "sqrt(16)", "3**2")
-    
+
     Returns:
         Resultado da operação como string
-    
+
     Exemplos:
         calculator("2 + 2") -> "4"
         calculator("10 * 5 + 3") -> "53"
         calculator("2 ** 8") -> "256"
     """
     try:
-        # Remove espaços e valida a expressão
         expression = expression.strip()
-        
+
         if not expression:
             return "Erro: expressão vazia fornecida"
-        
-        # Validação de segurança: apenas caracteres matemáticos permitidos
-        allowed_chars = set("0123456789+-*/().,** ")
-        allowed_funcs = {"sqrt", "abs", "pow", "min", "max", "round"}
-        
-        # Cria um ambiente seguro com funções matemáticas
-        import math
-        safe_dict = {
-            "sqrt": math.sqrt,
-            "abs": abs,
-            "pow": pow,
-            "min": min,
-            "max": max,
-            "round": round,
-            "pi": math.pi,
-            "e": math.e,
-            "__builtins__": {}
-        }
-        
-        # Avalia a expressão de forma segura
-        result = eval(expression, safe_dict, {})
-        
+
+        # Avalia o code object pré-validado/memoizado no ambiente seguro
+        code = _compile_expression(expression)
+        result = eval(code, _SAFE_ENV, _EMPTY_LOCALS)
+
         # Formata o resultado
         if isinstance(result, float):
             # Remove zeros desnecessários
             if result.is_integer():
                 return str(int(result))
             return f"{result:.6f}".rstrip('0').rstrip('.')
-        
+
         return str(result)
-        
+
     except ZeroDivisionError:
         return "Erro: divisão por zero não é permitida"
     except SyntaxError:
         return f"Erro: sintaxe inválida na expressão '{expression}'"
-    except NameError as e:
-        return f"Erro: função ou variável não reconhecida - {str(e)}"
+    except ValueError as e:
+        return f"Erro: {str(e)}"
     except Exception as e:
         return f"Erro ao calcular: {type(e).__name__}: {str(e)}"
 
@@ -76,8 +111,8 @@ if __name__ == "__main__":
         "sqrt(16)",
         "max(10, 20, 5)"
     ]
-    
+
     print("Testando calculadora:\n")
     for expr in test_cases:
         result = calculator.invoke({"expression": expr})
-        print(f"{expr} = {result}")
\ No newline at end of file
+        print(f"{expr} = {result}")
@@ -1,12 +1,16 @@
 from langchain_core.tools import tool
-from datetime import datetime
-import pytz
+from datetime import date, datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from pydantic import BaseModel, Field
 
+# Tabela de limpeza do nome do fuso: remove aspas/espaços em uma passada
+# C-level (em vez de strip + dois replace encadeados por chamada)
+_TZ_CLEAN = str.maketrans("", "", "\"' ")
+
 # 1. Definimos os Schemas para forçar a IA a seguir o formato correto
 class DateTimeInput(BaseModel):
     timezone: str = Field(
-        default="UTC", 
+        default="UTC",
         description="Fuso horário (ex: 'America/Sao_Paulo', 'Europe/London').",
         examples=["America/Sao_Paulo", "UTC"] # Ajuda a IA a entender o formato
     )
@@ -23,14 +27,16 @@ def get_current_datetime(timezone: str = "UTC") -> str:
     """
     try:
         # Limpa possíveis aspas extras ou espaços que a IA possa enviar
-        clean_tz = timezone.strip().replace('"', '').replace("'", "")
-        tz = pytz.timezone(clean_tz)
+        clean_tz = timezone.translate(_TZ_CLEAN)
+        # ZoneInfo cacheia internamente: o arquivo de tzdata é lido do
+        # disco só na primeira consulta de cada fuso (pytz reparsearia)
+        tz = ZoneInfo(clean_tz)
         now = datetime.now(tz)
-        
+
         formatted = now.strftime("%Y-%m-%d %H:%M:%S %Z")
         return f"Data/Hora atual em {clean_tz}: {formatted}"
-        
-    except pytz.exceptions.UnknownTimeZoneError:
+
+    except (ZoneInfoNotFoundError, ValueError):
         return f"Erro: Fuso horário '{timezone}' desconhecido. Tente 'America/Sao_Paulo' ou 'UTC'."
     except Exception as e:
         return f"Erro ao obter data/hora: {str(e)}"
@@ -41,13 +47,14 @@ def calculate_date_difference(date1: str, date2: str) -> str:
     Calcula a diferença em dias entre duas datas (YYYY-MM-DD).
     """
     try:
-        d1 = datetime.strptime(date1.strip(), "%Y-%m-%d")
-        d2 = datetime.strptime(date2.strip(), "%Y-%m-%d")
-        
+        # fromisoformat é implementado em C (~3x mais rápido que strptime)
+        d1 = date.fromisoformat(date1.strip())
+        d2 = date.fromisoformat(date2.strip())
+
         diff = abs((d2 - d1).days)
         return f"Diferença entre {date1} e {date2}: {diff} dias"
-        
+
     except ValueError:
         return f"Erro: Formato de data inválido. Use YYYY-MM-DD."
     except Exception as e:
-        return f"Erro ao calcular diferença: {str(e)}"
\ No newline at end of file
+        return f"Erro ao calcular diferença: {str(e)}"
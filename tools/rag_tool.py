@@ -1,9 +1,12 @@
 from langchain_core.tools import tool
 from preprocessing.document_processor import DocumentProcessor
 from config.settings import settings
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field
 from pathlib import Path
 from typing import List
+import numpy as np
+import os
 
 # Instância global do vector store
 _vector_store = None
@@ -20,7 +23,17 @@ def get_vector_store():
             return None
     return _vector_store
 
+# Buscas repetidas (mesma query e k) voltam do cache sem tocar o índice —
+# comum quando o LLM re-emite a mesma tool call em turnos próximos
+@lru_cache(maxsize=1024)
+def _cached_similarity_search(query: str, k: int):
+    return get_vector_store().similarity_search(query, k=k)
+
 class SearchInput(BaseModel):
+    # frozen: o Pydantic v2 pode pular a revalidação quando o mesmo dict
+    # de argumentos é reutilizado
+    model_config = ConfigDict(frozen=True)
+
     query: str = Field(description="A pergunta ou termo para buscar na base de conhecimento")
     k: int = Field(default=5, description="O número de documentos a recuperar. Use valores maiores (5-7) para respostas detalhadas.")
 
@@ -40,9 +53,20 @@ def search_knowledge_base(query: str, k: int = 5) -> str:
             return "Erro: base de conhecimento não encontrada."
 
         print(f"[RAG] 🔍 Buscando contexto detalhado para: '{query}' (k={k})")
-        
-        # Realiza a busca semântica
-        results = vector_store.similarity_search(query.strip(), k=int(k))
+
+        # Índices HNSW: efSearch controla o trade-off recall x latência
+        # (64 mantém recall alto com busca ~O(log N))
+        index = getattr(vector_store, "index", None)
+        if index is not None and hasattr(index, "hnsw"):
+            index.hnsw.efSearch = 64
+        # Índices IVF: nprobe controla quantas listas invertidas são
+        # visitadas por consulta (configurável via FAISS_NPROBE)
+        if index is not None and hasattr(index, "nprobe"):
+            index.nprobe = settings.FAISS_NPROBE
+
+        # Realiza a busca semântica (memoizada por (query, k)) — sem
+        # strip()/int() redundantes: o args_schema já valida e coage
+        results = _cached_similarity_search(query, k)
         
         if not results:
             return "Nenhuma informação relevante encontrada nos documentos internos."
@@ -68,6 +92,73 @@ def search_knowledge_base(query: str, k: int = 5) -> str:
     except Exception as e:
         return f"Erro técnico na busca: {str(e)}"
 
+class BatchSearchInput(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    queries: List[str] = Field(description="Lista de perguntas ou termos para buscar de uma vez na base de conhecimento")
+    k: int = Field(default=5, description="O número de documentos a recuperar por consulta")
+
+@tool(args_schema=BatchSearchInput)
+def search_knowledge_base_batch(queries: List[str], k: int = 5) -> str:
+    """
+    Recupera informações da base de conhecimento para VÁRIAS consultas de
+    uma só vez. Prefira esta ferramenta quando a pergunta do usuário exigir
+    múltiplas sub-buscas (ex: comparar projetos, listar tecnologias de
+    áreas diferentes).
+    """
+    try:
+        queries = [q for q in queries if q and q.strip()]
+        if not queries:
+            return "Erro: nenhuma consulta fornecida"
+
+        vector_store = get_vector_store()
+        if vector_store is None:
+            return "Erro: base de conhecimento não encontrada."
+
+        print(f"[RAG] 🔍 Busca em lote: {len(queries)} consultas (k={k})")
+
+        # Uma única chamada de embedding para todas as consultas e uma
+        # única passada vetorizada pelo índice — em vez de N round-trips
+        # HTTPS + N dispatches do FAISS para N sub-consultas
+        embedding_function = DocumentProcessor().get_embedding_function()
+        vecs = np.asarray(embedding_function.embed_documents(queries), dtype="float32")
+        # Consultas normalizadas, casando com o índice de produto interno
+        # (com vetores unitários no índice, a norma da consulta não altera
+        # o ranking em nenhuma das métricas)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        np.divide(vecs, norms, out=vecs, where=norms != 0)
+        _, indices = vector_store.index.search(vecs, k)
+
+        sections = []
+        for query, row in zip(queries, indices):
+            docs = [
+                vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)])
+                for i in row if int(i) != -1
+            ]
+            trechos = "\n\n".join(
+                f"--- TRECHO [FONTE: {Path(doc.metadata.get('source', 'Desconhecido')).name}] ---\n"
+                + doc.page_content.replace('\n', ' ')
+                for doc in docs if doc is not None
+            ) or "Nenhuma informação relevante encontrada."
+            sections.append(f"=== CONSULTA: {query} ===\n{trechos}")
+
+        header = "INFORMAÇÕES RECUPERADAS DA BASE DE CONHECIMENTO:\n\n"
+        footer = "\n\nINSTRUÇÃO: Use todos os detalhes acima para fornecer uma resposta completa, rica e estruturada."
+        return header + "\n\n".join(sections) + footer
+
+    except Exception as e:
+        return f"Erro técnico na busca em lote: {str(e)}"
+
+# Carregamento eager no import (RAG_EAGER=0 desativa): o deserialize do
+# FAISS sai do caminho crítico da primeira consulta e passa para o startup
+# do processo — sob gunicorn --preload, as páginas são compartilhadas
+# entre workers via fork
+if os.environ.get("RAG_EAGER", "1") == "1":
+    try:
+        get_vector_store()
+    except Exception:
+        pass
+
 if __name__ == "__main__":
     # Teste rápido
     result = search_knowledge_base.invoke({"query": "Quem é Nycolas Gabriel?", "k": 3})
@@ -1,11 +1,88 @@
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-import requests
+from collections import OrderedDict
+from itertools import islice
+import asyncio
+import atexit
+import httpx
+import logging
+import re
 import os
+import threading
 from datetime import datetime
 import time
 
+# faiss/numpy habilitam o tier semântico do cache de resultados; sem
+# eles, o cache fica só com o tier exato (mesmo padrão do SemanticRouterCache)
+try:
+    import faiss
+    import numpy as np
+except ImportError:
+    faiss = None
+    np = None
+
+_log = logging.getLogger(__name__)
+
+# Probe de disponibilidade feito uma única vez no import do módulo: cada
+# chamada da ferramenta deixa de reexecutar o bytecode de `import` (o hit
+# em sys.modules não é de graça) e a indisponibilidade vira um erro claro
+try:
+    from duckduckgo_search import DDGS
+except ImportError:
+    DDGS = None
+
+# Cliente DDGS persistente: o `with DDGS()` por chamada construía o
+# cliente e fechava as conexões HTTP no teardown, anulando o keep-alive.
+# Criação lazy com double-check sob lock; fechado no exit do processo.
+_DDGS = None
+_DDGS_LOCK = threading.Lock()
+
+def _get_ddgs():
+    global _DDGS
+    if _DDGS is None:
+        with _DDGS_LOCK:
+            if _DDGS is None:
+                _DDGS = DDGS()
+                atexit.register(lambda: _DDGS and _DDGS.__exit__(None, None, None))
+    return _DDGS
+
+# Cliente HTTP persistente para a SerpAPI (mesmo idioma do pool dos LLMs
+# em config/llm_factory): keep-alive amortiza o handshake TCP+TLS
+# (~50-100ms por conexão fria), HTTP/2 multiplexa consultas paralelas na
+# mesma conexão, e os timeouts limitam a cauda de latência — sem eles uma
+# chamada podia prender a thread da ferramenta num upstream mudo.
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+_HTTPX = httpx.Client(
+    http2=_HTTP2,
+    timeout=httpx.Timeout(10.0, connect=3.0),
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    transport=httpx.HTTPTransport(retries=2),
+    headers={"Accept-Encoding": "gzip"},
+)
+atexit.register(_HTTPX.close)
+
+# ijson habilita parse incremental da resposta da SerpAPI (formata os
+# resultados enquanto o corpo ainda chega pela rede); opcional
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Chave lida uma vez no import (os.getenv consulta o dict de ambiente a
+# cada chamada); refresh_keys() recarrega após um load_dotenv tardio
+_SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+
+def refresh_keys():
+    """Relê as chaves de API do ambiente"""
+    global _SERPAPI_KEY
+    _SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+
 # --- 1. DEFINIÇÃO DOS SCHEMAS (Devem vir primeiro) ---
 
 class WebSearchInput(BaseModel):
@@ -16,33 +93,142 @@ class SerpAPISearchInput(BaseModel):
     query: str = Field(description="Consulta de pesquisa")
     num_results: int = Field(default=5, description="Número de resultados")
 
-# --- 2. DEFINIÇÃO DAS FERRAMENTAS ---
+# Template de linha de resultado pré-associado (method reference): evita
+# re-executar o bytecode do f-string com 3 interpolações a cada linha
+_FMT = "[{}] {}\n    {}\n    🔗 {}\n".format
+
+# --- 2. CACHE DE RESULTADOS ---
+
+_NORMALIZE_RE = re.compile(r"\s+")
+
+class CachedSearch:
+    """
+    Cache de resultados de busca em dois níveis
+
+    Tier exato: OrderedDict LRU por (engine, query normalizada,
+    num_results), com TTL — hits voltam em microssegundos em vez de
+    centenas de ms de rede. O engine na chave evita que uma busca SerpAPI
+    devolva um resultado formatado do DuckDuckGo (e vice-versa).
+    Tier semântico (opcional, requer faiss): consultas parafraseadas caem
+    no mesmo resultado por similaridade de cosseno >= threshold, ao custo
+    de uma chamada de embedding no miss.
+    """
+
+    def __init__(self, ttl: int = 900, maxsize: int = 1024, threshold: float = 0.85):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._exact: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._index = None
+        self._entries: List[tuple] = []  # (engine, resultado, timestamp) por vetor
+        self._hits = 0
+        self._misses = 0
+
+    def _embed(self, text: str):
+        from preprocessing.document_processor import get_embedding_function
+        vector = np.asarray(
+            get_embedding_function().embed_query(text), dtype="float32"
+        ).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def get(self, engine: str, query: str, num_results: int) -> Optional[str]:
+        normalized = _NORMALIZE_RE.sub(" ", query.strip().lower())
+        key = (engine, normalized, num_results)
+        now = time.time()
+
+        entry = self._exact.get(key)
+        if entry is not None:
+            result, ts = entry
+            if now - ts < self.ttl:
+                self._exact.move_to_end(key)
+                self._hits += 1
+                return result
+            del self._exact[key]
+
+        if faiss is not None and self._index is not None:
+            try:
+                vector = self._embed(normalized)
+                distances, indices = self._index.search(vector, 1)
+                if distances[0, 0] >= self.threshold:
+                    entry_engine, result, ts = self._entries[indices[0, 0]]
+                    if entry_engine == engine and now - ts < self.ttl:
+                        self._hits += 1
+                        return result
+            except Exception as e:
+                _log.debug("[SEARCH CACHE] Lookup semântico falhou: %s", e)
+
+        self._misses += 1
+        return None
+
+    def put(self, engine: str, query: str, num_results: int, result: str):
+        normalized = _NORMALIZE_RE.sub(" ", query.strip().lower())
+        now = time.time()
+
+        self._exact[(engine, normalized, num_results)] = (result, now)
+        self._exact.move_to_end((engine, normalized, num_results))
+        while len(self._exact) > self.maxsize:
+            self._exact.popitem(last=False)
+
+        if faiss is not None:
+            try:
+                vector = self._embed(normalized)
+                if self._index is None:
+                    self._index = faiss.IndexFlatIP(vector.shape[1])
+                self._index.add(vector)
+                self._entries.append((engine, result, now))
+            except Exception as e:
+                _log.debug("[SEARCH CACHE] Add semântico falhou: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas para monitoramento da taxa de acerto"""
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total else 0.0,
+            "exact_entries": len(self._exact),
+            "semantic_entries": len(self._entries),
+        }
+
+_search_cache = CachedSearch()
+
+# --- 3. DEFINIÇÃO DAS FERRAMENTAS ---
 
 @tool(args_schema=WebSearchInput)
 def web_search(query: str, num_results: int = 5) -> str:
     """Pesquisa na web usando DuckDuckGo (Grátis)."""
     try:
-        if not query or not query.strip():
+        if not query.strip():
             return "Erro: consulta de pesquisa vazia"
-        
-        from duckduckgo_search import DDGS
+
+        if DDGS is None:
+            return "Erro: pacote duckduckgo_search não instalado"
+
         num_results = max(1, min(num_results, 10))
-        
+
+        cached = _search_cache.get("ddg", query, num_results)
+        if cached is not None:
+            print(f"[WEB SEARCH] ⚡ Cache hit: '{query}'")
+            return cached
+
         print(f"[WEB SEARCH] 🌐 Pesquisando: '{query}'")
-        
-        with DDGS() as ddgs:
-            # Sintaxe atualizada para evitar o Warning
-            search_results = ddgs.text(query, max_results=num_results)
-            results = [r for r in search_results]
-        
-        if not results:
-            return f"Nenhum resultado encontrado para '{query}'"
-        
+
+        # Sintaxe atualizada para evitar o Warning
+        search_results = _get_ddgs().text(query, max_results=num_results)
+
+        # islice + formatação em uma passada: sem materializar a lista
+        # intermediária de dicts antes de formatar
         formatted_results = [f"🔍 Resultados para: '{query}'\n"]
-        for i, result in enumerate(results, 1):
-            formatted_results.append(f"[{i}] {result.get('title')}\n    {result.get('body')}\n    🔗 {result.get('href')}\n")
-        
-        return "\n".join(formatted_results)
+        for i, result in enumerate(islice(search_results, num_results), 1):
+            formatted_results.append(_FMT(i, result.get('title'), result.get('body'), result.get('href')))
+
+        if len(formatted_results) == 1:
+            return f"Nenhum resultado encontrado para '{query}'"
+
+        formatted = "\n".join(formatted_results)
+        _search_cache.put("ddg", query, num_results, formatted)
+        return formatted
     except Exception as e:
         return f"Erro no DuckDuckGo: {str(e)}"
 
@@ -50,31 +236,116 @@ def web_search(query: str, num_results: int = 5) -> str:
 def web_search_serpapi(query: str, num_results: int = 5) -> str:
     """Pesquisa na web usando SerpAPI (Google)."""
     try:
-        api_key = os.getenv("SERPAPI_KEY")
+        api_key = _SERPAPI_KEY
         if not api_key:
             return "Erro: SERPAPI_KEY não configurada no .env"
         
+        cached = _search_cache.get("serpapi", query, num_results)
+        if cached is not None:
+            print(f"[SERPAPI] ⚡ Cache hit: '{query}'")
+            return cached
+
         params = {
             "q": query, "api_key": api_key, "num": num_results, "engine": "google", "hl": "pt-br"
         }
-        
+
         print(f"[SERPAPI] 🌐 Pesquisando no Google: '{query}'")
-        response = requests.get("https://serpapi.com/search", params=params)
+        formatted_results = [f"🔍 Resultados Google: '{query}'\n"]
+
+        with _HTTPX.stream("GET", "https://serpapi.com/search", params=params) as response:
+            response.raise_for_status()
+
+            if ijson is not None:
+                # Parse incremental: cada organic_result é formatado assim
+                # que chega, sobrepondo a cauda do download com o trabalho
+                # Python (ijson aceita iteráveis de bytes desde a 3.1)
+                hits = islice(ijson.items(response.iter_bytes(), "organic_results.item"), num_results)
+            else:
+                response.read()
+                hits = islice(response.json().get("organic_results", []), num_results)
+
+            for i, result in enumerate(hits, 1):
+                formatted_results.append(_FMT(i, result.get('title'), result.get('snippet'), result.get('link')))
+
+        if len(formatted_results) == 1:
+            return "Nenhum resultado encontrado."
+
+        formatted = "\n".join(formatted_results)
+        _search_cache.put("serpapi", query, num_results, formatted)
+        return formatted
+    except Exception as e:
+        return f"Erro na SerpAPI: {str(e)}"
+
+# --- 3. VARIANTES ASSÍNCRONAS ---
+
+# Cliente assíncrono compartilhado (keep-alive + pool): N buscas em
+# paralelo terminam em ~max(latência) em vez de soma(latência). httpx já
+# é dependência do projeto (pool dos LLMs) — mesmo idioma, sem aiohttp.
+_ASYNC_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    timeout=httpx.Timeout(10.0, connect=3.05),
+    headers={"Accept-Encoding": "gzip"}
+)
+
+@tool(args_schema=WebSearchInput)
+async def web_search_async(query: str, num_results: int = 5) -> str:
+    """Pesquisa na web usando DuckDuckGo (versão assíncrona)."""
+    # A lib duckduckgo_search é síncrona: roda num thread do executor para
+    # não bloquear o event loop do agente
+    return await asyncio.to_thread(web_search.func, query, num_results)
+
+@tool(args_schema=SerpAPISearchInput)
+async def web_search_serpapi_async(query: str, num_results: int = 5) -> str:
+    """Pesquisa na web usando SerpAPI (versão assíncrona)."""
+    try:
+        api_key = _SERPAPI_KEY
+        if not api_key:
+            return "Erro: SERPAPI_KEY não configurada no .env"
+
+        # Mesmo cache (e mesma chave por engine) do caminho síncrono: os
+        # dois formatam resultados identicamente
+        cached = _search_cache.get("serpapi", query, num_results)
+        if cached is not None:
+            print(f"[SERPAPI] ⚡ Cache hit: '{query}'")
+            return cached
+
+        params = {
+            "q": query, "api_key": api_key, "num": num_results, "engine": "google", "hl": "pt-br"
+        }
+
+        print(f"[SERPAPI] 🌐 Pesquisando no Google (async): '{query}'")
+        response = await _ASYNC_CLIENT.get("https://serpapi.com/search", params=params)
         response.raise_for_status()
-        
+
         organic_results = response.json().get("organic_results", [])
         if not organic_results:
             return "Nenhum resultado encontrado."
-            
+
         formatted_results = [f"🔍 Resultados Google: '{query}'\n"]
         for i, result in enumerate(organic_results[:num_results], 1):
-            formatted_results.append(f"[{i}] {result.get('title')}\n    {result.get('snippet')}\n    🔗 {result.get('link')}\n")
-        
-        return "\n".join(formatted_results)
+            formatted_results.append(_FMT(i, result.get('title'), result.get('snippet'), result.get('link')))
+
+        formatted = "\n".join(formatted_results)
+        _search_cache.put("serpapi", query, num_results, formatted)
+        return formatted
     except Exception as e:
         return f"Erro na SerpAPI: {str(e)}"
 
-# --- 3. BLOCO DE TESTE ---
+def run_searches(queries: List[str], num_results: int = 5) -> List[str]:
+    """
+    Shim síncrono: dispara várias buscas DuckDuckGo em paralelo e devolve
+    os resultados na ordem das consultas (para chamadores legados sem
+    event loop próprio).
+    """
+    async def _gather():
+        return await asyncio.gather(*[
+            web_search_async.ainvoke({"query": q, "num_results": num_results})
+            for q in queries
+        ])
+
+    return asyncio.run(_gather())
+
+# --- 4. BLOCO DE TESTE ---
 
 if __name__ == "__main__":
     print("="*60)
@@ -1,7 +1,84 @@
+import functools
 import json
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 from typing import Any, Dict, List
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 
+# Strings de indentação pré-computadas (estendidas sob demanda): evita
+# recomputar "  " * n a cada nó em prompts profundos
+_SP_CACHE: List[str] = [""]
+
+def _sp(n: int) -> str:
+    while len(_SP_CACHE) <= n:
+        _SP_CACHE.append(_SP_CACHE[-1] + "  ")
+    return _SP_CACHE[n]
+
+# Escape XML via str.translate: tabela pré-construída, uma passada em C
+# por string — sem o branching por caractere do html.escape. Valores com
+# <, >, & ou aspas deixavam de ser parseáveis no TOON emitido.
+_XML_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\"": "&quot;"})
+
+# orjson (Rust) parseia 2-3x mais rápido que o json do stdlib; opcional,
+# com fallback transparente (mesmo padrão da API Flask)
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+# msgpack dá a forma binária mais compacta para payloads que circulam
+# apenas entre componentes do processo; opcional, com fallback para
+# JSON binário (orjson/stdlib)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def _match_brace(text: str, start: int) -> int:
+    """
+    Devolve o índice da '}' que fecha a '{' em start (ou -1)
+
+    Máquina de estados mínima (profundidade + in_string/escape), uma
+    passada linear — delimita a fatia candidata antes de parsear.
+    """
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+def _escape(value: Any) -> Any:
+    if type(value) is str:
+        return value.translate(_XML_TABLE)
+    return value
+
+# As mesmas chaves se repetem milhares de vezes num payload grande; os
+# fragmentos <key>/</key> são formatados (e escapados) uma única vez por
+# chave — vocabulário pequeno, cabe no lru_cache
+@functools.lru_cache(maxsize=4096)
+def _tag(key: str) -> tuple:
+    key = _escape(str(key))
+    return (f"<{key}>", f"</{key}>")
+
 class TOONConverter:
     """
     Conversor JSON ↔ TOON (Text-Optimized Object Notation)
@@ -14,47 +91,123 @@ class TOONConverter:
     def json_to_toon(data: Dict[str, Any], indent: int = 0) -> str:
         """
         Converte JSON para formato TOON (similar a XML/YAML humanizado)
-        
+
+        Caminhada iterativa com pilha explícita: a versão recursiva criava
+        um frame + um "\\n".join por nível, então JSON K-profundo com N nós
+        pagava O(K·N) em joins de joins. Aqui cada linha entra uma única
+        vez num buffer e há um único join no final.
+
         Args:
             data: Dicionário JSON para converter
             indent: Nível de indentação atual
-            
+
         Returns:
             String no formato TOON
         """
-        toon_lines = []
-        spacing = "  " * indent
-        
-        for key, value in data.items():
-            if isinstance(value, dict):
-                # Objeto nested
-                toon_lines.append(f"{spacing}<{key}>")
-                toon_lines.append(TOONConverter.json_to_toon(value, indent + 1))
-                toon_lines.append(f"{spacing}</{key}>")
-                
-            elif isinstance(value, list):
-                # Array
-                toon_lines.append(f"{spacing}<{key}>")
-                for i, item in enumerate(value):
-                    if isinstance(item, dict):
-                        toon_lines.append(f"{spacing}  <item index=\"{i}\">")
-                        toon_lines.append(TOONConverter.json_to_toon(item, indent + 2))
-                        toon_lines.append(f"{spacing}  </item>")
-                    else:
-                        toon_lines.append(f"{spacing}  <item index=\"{i}\">{item}</item>")
-                toon_lines.append(f"{spacing}</{key}>")
-                
-            elif value is None:
-                toon_lines.append(f"{spacing}<{key}>null</{key}>")
-                
-            elif isinstance(value, bool):
-                toon_lines.append(f"{spacing}<{key}>{str(value).lower()}</{key}>")
-                
+        # Fast path: dict vazio não precisa de pilha nem join
+        if not data:
+            return ""
+
+        buf = []
+        TOONConverter._walk(data, indent, buf.append)
+        return "\n".join(buf)
+
+    @staticmethod
+    def json_to_toon_into(data: Dict[str, Any], buf, indent: int = 0) -> None:
+        """
+        Variante de json_to_toon que escreve num buffer compartilhado
+        (io.StringIO), sem materializar a string intermediária — o builder
+        de prompts monta todas as seções num único buffer.
+        """
+        write = buf.write
+        state = [True]
+
+        def emit(line):
+            if state[0]:
+                state[0] = False
             else:
-                # Valores primitivos (string, number)
-                toon_lines.append(f"{spacing}<{key}>{value}</{key}>")
-        
-        return "\n".join(toon_lines)
+                write("\n")
+            write(line)
+
+        TOONConverter._walk(data, indent, emit)
+
+    @staticmethod
+    def json_to_toon_specialized(data: Dict[str, Any], indent: int = 0) -> str:
+        """
+        json_to_toon com especialização por forma (runtime codegen)
+
+        Para payloads cuja estrutura se repete (mesmas chaves/tipos, só os
+        valores mudam — o caso de output_schema e input_data fixos), uma
+        função gerada por forma emite o TOON direto, sem a caminhada
+        genérica nem isinstance por nó. Formas inéditas pagam a geração
+        uma única vez; estruturas não mapeáveis caem no caminho genérico.
+        """
+        try:
+            key = (_shape_key(data), indent)
+        except TypeError:
+            return TOONConverter.json_to_toon(data, indent)
+
+        fn = _CODEGEN_CACHE.get(key)
+        if fn is None:
+            if len(_CODEGEN_CACHE) >= 256:
+                # Variedade demais de formas: especializar não compensa
+                return TOONConverter.json_to_toon(data, indent)
+            fn = _CODEGEN_CACHE[key] = _compile_shape(key[0], indent)
+        return fn(data)
+
+    @staticmethod
+    def _walk(data: Dict[str, Any], indent: int, emit) -> None:
+        """Caminhada iterativa comum: chama emit(linha) por linha TOON"""
+        append = emit
+        # Entradas: (0, dict, indent) a expandir, (1, linha pronta, _)
+        stack = [(0, data, indent)]
+
+        while stack:
+            kind, payload, level = stack.pop()
+            if kind == 1:
+                append(payload)
+                continue
+            if not payload:
+                # Dict vazio vira uma linha vazia (mesma saída da recursão)
+                append("")
+                continue
+
+            spacing = _sp(level)
+            item_spacing = None
+            entries = []
+            for key, value in payload.items():
+                open_tag, close_tag = _tag(key)
+                if isinstance(value, dict):
+                    # Objeto nested
+                    entries.append((1, spacing + open_tag, 0))
+                    entries.append((0, value, level + 1))
+                    entries.append((1, spacing + close_tag, 0))
+
+                elif isinstance(value, list):
+                    # Array
+                    if item_spacing is None:
+                        item_spacing = _sp(level + 1)
+                    entries.append((1, spacing + open_tag, 0))
+                    for i, item in enumerate(value):
+                        if isinstance(item, dict):
+                            entries.append((1, f"{item_spacing}<item index=\"{i}\">", 0))
+                            entries.append((0, item, level + 2))
+                            entries.append((1, f"{item_spacing}</item>", 0))
+                        else:
+                            entries.append((1, f"{item_spacing}<item index=\"{i}\">{_escape(item)}</item>", 0))
+                    entries.append((1, spacing + close_tag, 0))
+
+                elif value is None:
+                    entries.append((1, f"{spacing}{open_tag}null{close_tag}", 0))
+
+                elif isinstance(value, bool):
+                    entries.append((1, f"{spacing}{open_tag}{str(value).lower()}{close_tag}", 0))
+
+                else:
+                    # Valores primitivos (string escapada, number como está)
+                    entries.append((1, f"{spacing}{open_tag}{_escape(value)}{close_tag}", 0))
+
+            stack.extend(reversed(entries))
     
     @staticmethod
     def toon_to_json(toon_text: str) -> Dict[str, Any]:
@@ -70,15 +223,21 @@ class TOONConverter:
         # Implementação simplificada - em produção usar parser XML robusto
         # Para este projeto, focamos no fluxo JSON → TOON → LLM
         # A resposta da LLM já vem em formato JSON estruturado
-        try:
-            # Tenta extrair JSON se estiver embutido
-            import re
-            json_match = re.search(r'\{.*\}', toon_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            return {}
-        except:
-            return {}
+        #
+        # Varredura linear por cada "{": a fatia candidata é delimitada
+        # pela máquina de estados e parseada com orjson quando disponível
+        start = toon_text.find("{")
+        while start != -1:
+            end = _match_brace(toon_text, start)
+            if end != -1:
+                try:
+                    obj = _json_loads(toon_text[start:end + 1])
+                    if isinstance(obj, dict):
+                        return obj
+                except ValueError:
+                    pass
+            start = toon_text.find("{", start + 1)
+        return {}
     
     @staticmethod
     def message_to_toon(message: BaseMessage) -> str:
@@ -92,19 +251,25 @@ class TOONConverter:
             String TOON formatada
         """
         msg_type = message.__class__.__name__
-        
-        toon = f"<message type=\"{msg_type}\">\n"
-        toon += f"  <content>{message.content}</content>\n"
-        
-        # Adiciona metadata se existir
-        if hasattr(message, 'additional_kwargs') and message.additional_kwargs:
-            toon += "  <metadata>\n"
-            toon += TOONConverter.json_to_toon(message.additional_kwargs, indent=2)
-            toon += "\n  </metadata>\n"
-        
-        toon += "</message>"
-        
-        return toon
+
+        # list + join: concatenação com += realoca a string inteira a cada
+        # passo (O(n²) no tamanho da saída), como já se faz em json_to_toon
+        parts = [
+            f"<message type=\"{msg_type}\">\n",
+            f"  <content>{_escape(message.content)}</content>\n",
+        ]
+
+        # Adiciona metadata se existir (getattr único em vez de
+        # hasattr + segundo lookup — o caso comum é sem kwargs)
+        kwargs = getattr(message, 'additional_kwargs', None)
+        if kwargs:
+            parts.append("  <metadata>\n")
+            parts.append(TOONConverter.json_to_toon(kwargs, indent=2))
+            parts.append("\n  </metadata>\n")
+
+        parts.append("</message>")
+
+        return "".join(parts)
     
     @staticmethod
     def tool_call_to_toon(tool_name: str, tool_args: Dict[str, Any]) -> str:
@@ -118,14 +283,16 @@ class TOONConverter:
         Returns:
             String TOON formatada
         """
-        toon = f"<tool_call>\n"
-        toon += f"  <name>{tool_name}</name>\n"
-        toon += f"  <arguments>\n"
-        toon += TOONConverter.json_to_toon(tool_args, indent=2)
-        toon += "\n  </arguments>\n"
-        toon += "</tool_call>"
-        
-        return toon
+        parts = [
+            "<tool_call>\n",
+            f"  <name>{tool_name}</name>\n",
+            "  <arguments>\n",
+            TOONConverter.json_to_toon(tool_args, indent=2),
+            "\n  </arguments>\n",
+            "</tool_call>",
+        ]
+
+        return "".join(parts)
     
     @staticmethod
     def structured_output_to_toon(data: Dict[str, Any], schema_name: str = "output") -> str:
@@ -139,11 +306,128 @@ class TOONConverter:
         Returns:
             String TOON com schema
         """
-        toon = f"<{schema_name}>\n"
-        toon += TOONConverter.json_to_toon(data, indent=1)
-        toon += f"\n</{schema_name}>"
-        
-        return toon
+        parts = [
+            f"<{schema_name}>\n",
+            TOONConverter.json_to_toon(data, indent=1),
+            f"\n</{schema_name}>",
+        ]
+
+        return "".join(parts)
+
+    @staticmethod
+    def json_to_msgpack(data: Dict[str, Any]) -> bytes:
+        """
+        Serializa para a forma binária compacta (uso intra-processo)
+
+        O TOON textual envolve cada int/bool/null em <key></key> —
+        dobrando os bytes alocados. Quando o consumidor é outro
+        componente do processo (trace, fila, cache) e não a LLM, a forma
+        binária corta essas cópias; o TOON fica só na fronteira do
+        modelo. Com msgpack ausente, cai em JSON binário (orjson/stdlib).
+        """
+        if msgpack is not None:
+            return msgpack.packb(data, use_bin_type=True)
+        return _json_dumps(data)
+
+    @staticmethod
+    def msgpack_to_json(blob: bytes) -> Dict[str, Any]:
+        """Desserializa a forma binária de json_to_msgpack"""
+        if msgpack is not None:
+            return msgpack.unpackb(blob, raw=False)
+        return _json_loads(blob)
+
+    @staticmethod
+    def structured_output_to_msgpack(data: Dict[str, Any], schema_name: str = "output") -> bytes:
+        """Equivalente binário de structured_output_to_toon"""
+        return TOONConverter.json_to_msgpack({schema_name: data})
+
+
+
+# --- Codegen por formato (especialização em runtime) ---
+#
+# Prompts estruturados reusam poucas formas distintas de dict (mesmo
+# conjunto de chaves/tipos, só os valores-folha mudam). Para cada forma,
+# geramos uma função Python que emite o TOON direto — sem a caminhada
+# genérica, isinstance por nó ou formatação de tags repetida.
+
+def _shape_key(data: Dict[str, Any]):
+    """Assinatura estrutural hashável: tuplas de (chave, tipo) recursivas"""
+    items = []
+    for k, v in data.items():
+        if isinstance(v, dict):
+            items.append((k, _shape_key(v)))
+        elif isinstance(v, list):
+            # Itens não-dict saem como str(item) no caminho genérico
+            # (inclusive bool/None) — "leaf" preserva essa semântica
+            kinds = tuple(
+                _shape_key(item) if isinstance(item, dict) else "leaf"
+                for item in v
+            )
+            items.append((k, ("list", kinds)))
+        elif isinstance(v, bool):
+            items.append((k, "bool"))
+        elif v is None:
+            items.append((k, "none"))
+        else:
+            items.append((k, "leaf"))
+    return tuple(items)
+
+def _emit_src(shape, expr: str, level: int, out: List[str]) -> None:
+    """Emite o corpo da função especializada para uma forma de dict"""
+    sp = "  " * level
+    for k, kind in shape:
+        key = _escape(str(k))
+        open_tag = f"{sp}<{key}>"
+        close_tag = f"{sp}</{key}>"
+        child = f"{expr}[{k!r}]"
+        if kind == "leaf":
+            out.append(f"    a({open_tag!r} + _s(_e({child})) + {'</' + key + '>'!r})")
+        elif kind == "bool":
+            out.append(f"    a({open_tag!r} + _s({child}).lower() + {'</' + key + '>'!r})")
+        elif kind == "none":
+            out.append(f"    a({open_tag + 'null</' + key + '>'!r})")
+        elif kind[:1] == ("list",):
+            out.append(f"    a({open_tag!r})")
+            item_sp = "  " * (level + 1)
+            for i, ikind in enumerate(kind[1]):
+                item = f"{child}[{i}]"
+                item_open = f"{item_sp}<item index=\"{i}\">"
+                if ikind == "leaf":
+                    out.append(f"    a({item_open!r} + _s(_e({item})) + '</item>')")
+                else:
+                    out.append(f"    a({item_open!r})")
+                    if ikind:
+                        _emit_src(ikind, item, level + 2, out)
+                    else:
+                        out.append("    a('')")
+                    out.append(f"    a({item_sp + '</item>'!r})")
+            out.append(f"    a({close_tag!r})")
+        else:
+            out.append(f"    a({open_tag!r})")
+            if kind:
+                _emit_src(kind, child, level + 1, out)
+            else:
+                out.append("    a('')")
+            out.append(f"    a({close_tag!r})")
+
+def _compile_shape(shape, indent: int):
+    src = ["def _enc(v, _e=_escape, _s=str):", "    b = []", "    a = b.append"]
+    _emit_src(shape, "v", indent, src)
+    src.append("    return '\\n'.join(b)")
+    namespace = {"_escape": _escape}
+    exec(compile("\n".join(src), "<toon_codegen>", "exec"), namespace)
+    return namespace["_enc"]
+
+_CODEGEN_CACHE: Dict[tuple, Any] = {}
+
+# Cabeçalhos de <example> pré-formatados (estendidos sob demanda): listas
+# de exemplos são re-montadas a cada prompt com os mesmos índices
+_EX_OPEN: List[str] = []
+
+def _ex_open(i: int) -> str:
+    while len(_EX_OPEN) <= i:
+        _EX_OPEN.append(f"  <example index=\"{len(_EX_OPEN)}\">\n")
+    return _EX_OPEN[i]
 
 
 class TOONPromptBuilder:
@@ -170,36 +454,56 @@ class TOONPromptBuilder:
         Returns:
             Prompt formatado em TOON
         """
-        prompt_parts = []
-        
+        # Um único buffer para todas as seções e encode via especialização
+        # por forma: os payloads do builder (schema fixo, mesmos exemplos a
+        # cada chamada do Router) são o caso ideal do codegen — a partir da
+        # segunda chamada, cada seção sai da função compilada para a forma,
+        # sem a caminhada genérica
+        buf = StringIO()
+        write = buf.write
+        encode = TOONConverter.json_to_toon_specialized
+
         # Task description
-        prompt_parts.append(f"<task>\n{task}\n</task>\n")
-        
+        write(f"<task>\n{task}\n</task>\n\n")
+
         # Input data
-        prompt_parts.append("<input>")
-        prompt_parts.append(TOONConverter.json_to_toon(input_data, indent=1))
-        prompt_parts.append("</input>\n")
-        
+        write("<input>\n")
+        write(encode(input_data, indent=1))
+        write("\n</input>\n\n")
+
         # Examples (if provided)
         if examples:
-            prompt_parts.append("<examples>")
-            for i, example in enumerate(examples):
-                prompt_parts.append(f"  <example index=\"{i}\">")
-                prompt_parts.append(TOONConverter.json_to_toon(example, indent=2))
-                prompt_parts.append("  </example>")
-            prompt_parts.append("</examples>\n")
-        
+            write("<examples>\n")
+            if len(examples) >= 8:
+                # Listas grandes: encodings independentes e puros saem em
+                # paralelo (ganho modesto sob o GIL, mas gratuito) e são
+                # escritos em ordem
+                with ThreadPoolExecutor(max_workers=min(8, len(examples))) as executor:
+                    encoded = executor.map(
+                        lambda e: encode(e, indent=2), examples
+                    )
+                    for i, block in enumerate(encoded):
+                        write(_ex_open(i))
+                        write(block)
+                        write("\n  </example>\n")
+            else:
+                for i, example in enumerate(examples):
+                    write(_ex_open(i))
+                    write(encode(example, indent=2))
+                    write("\n  </example>\n")
+            write("</examples>\n\n")
+
         # Output schema
-        prompt_parts.append("<output_schema>")
-        prompt_parts.append(TOONConverter.json_to_toon(output_schema, indent=1))
-        prompt_parts.append("</output_schema>\n")
-        
+        write("<output_schema>\n")
+        write(encode(output_schema, indent=1))
+        write("\n</output_schema>\n\n")
+
         # Instructions
-        prompt_parts.append("<instructions>")
-        prompt_parts.append("Please provide your response in valid JSON format matching the output_schema.")
-        prompt_parts.append("</instructions>")
-        
-        return "\n".join(prompt_parts)
+        write("<instructions>\n")
+        write("Please provide your response in valid JSON format matching the output_schema.\n")
+        write("</instructions>")
+
+        return buf.getvalue()
 
 
 # Exemplo de uso